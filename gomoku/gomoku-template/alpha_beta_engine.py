@@ -1,17 +1,60 @@
 from game_state import GameState
+from bitboard import INVERSE_SYMMETRIES, SYMMETRIES
 from evaluator import Evaluator
 from constants import Piece
+from transposition_table import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND, table_size
+from parallel import SharedStopFlag
+from opening_book import get_book
+from time_control import MoveTimer
+from move_ordering import MoveOrdering
+from threat_search import ThreatSearch, find_forced_win, DEFAULT_MAX_NODES, DEFAULT_TIME_LIMIT
+from multiprocessing import shared_memory
+import multiprocessing
+import queue
 import threading
+import time
+
+# Breite des Nullfensters, die Bewertungen sind ganzzahlig
+NULL_WINDOW = 1
+# Halbe Breite des Aspiration Windows um die Bewertung der vorherigen Tiefe, nach einem Fehlschlag wird sie
+# mit ASPIRATION_GROWTH multipliziert. Ab ASPIRATION_LIMIT wird mit dem vollen Fenster gesucht.
+ASPIRATION_WINDOW = 1000
+ASPIRATION_GROWTH = 4
+ASPIRATION_LIMIT = 1e5
 
 
 class AlphaBetaEngine:
 
-    def __init__(self, board=None, player=Piece.BLACK.value) -> None:
+    def __init__(self, board=None, player=Piece.BLACK.value, tt_size_mb=64, workers=1, transposition_table=None,
+                 threat_nodes=DEFAULT_MAX_NODES, threat_time=DEFAULT_TIME_LIMIT, interior_threat_nodes=0, book=None,
+                 analysis_store=None, stats=None, time_control=None) -> None:
         self.game_state = GameState(board, player)
-        self.transposition_table = {}
+        # Transpositionstabelle mit fester Größe (siehe transposition_table.py)
+        self.tt_size_mb = tt_size_mb
+        self.transposition_table = TranspositionTable(tt_size_mb) if transposition_table is None else transposition_table
+        # Killer-Züge und History-Tabelle (siehe move_ordering.py)
+        self.move_ordering = MoveOrdering()
+        # Anzahl Prozesse für Lazy-SMP, bei 1 wird im Evaluations-Thread gesucht
+        self.workers = workers
+        # Budget der Threat-Space Suche an der Wurzel (0 = aus) und der VCF-Suche an den Blättern (0 = aus)
+        self.threat_nodes = threat_nodes
+        self.threat_time = threat_time
+        self.interior_threat_nodes = interior_threat_nodes
+        self.leaf_solver = None
+        # Eröffnungsbuch (siehe opening_book.py), standardmäßig das prozessweite Buch
+        self.book = get_book() if book is None else book
+        # Optionaler persistenter Analyse-Speicher (siehe analysis_store.py)
+        self.analysis_store = analysis_store
+        # Optionale Instrumentierung der Suche (siehe search_stats.py), bei None ohne Kosten
+        self.stats = stats
+        # Optionale Bedenkzeit (siehe time_control.py), ohne sucht die Engine bis max_depth oder zum Stoppsignal
+        self.time_control = time_control
+        self.move_timer = None
 
         self.identity = player
         self.current_result = (-1, -1)
+        self.current_score = 0
+        self.current_depth = 0
         self.stop_event = threading.Event()
         self.evaluation_thread = None
 
@@ -19,21 +62,59 @@ class AlphaBetaEngine:
         self.nodes = 0
         self.alpha_cuts = 0
         self.beta_cuts = 0
+        self.nodes_per_second = 0
+        self.worker_nodes_per_second = []
 
-    def start_evaluation(self, position, player, max_depth=20):
+    def start_evaluation(self, position, player, max_depth=20, time_control=None):
         """
         Startet die Evaluation aus der GUI
         Muss nicht verändert werden.
+        Eine übergebene Zeitkontrolle gilt ab diesem Zug.
+        """
+        if time_control is not None:
+            self.time_control = time_control
+        if self.prepare(position, player):
+            return
+
+        self.evaluation_thread = threading.Thread(target=self.search, args=[max_depth])
+        self.evaluation_thread.start()
+
+    def analyse(self, position, player, max_depth=20, time_control=None) -> dict:
+        """
+        Bewertet die Stellung synchron im aufrufenden Thread, z.B. für Batch-Analysen.
+        Die Zeitkontrolle gilt nur für diesen Aufruf.
+        """
+        previous = self.time_control
+        self.time_control = time_control
+        try:
+            if not self.prepare(position, player):
+                self.search(max_depth)
+        finally:
+            self.time_control = previous
+        return {'move': self.current_result, 'score': self.current_score, 'depth': self.current_depth,
+                'nodes': self.nodes}
+
+    def prepare(self, position, player) -> bool:
+        """
+        Setzt die Engine auf die Stellung. Gibt True zurück, wenn sie aus dem Eröffnungsbuch beantwortet wurde.
         """
         self.stop_event.clear()
 
         self.game_state = GameState(position, player)
-        self.transposition_table = {}
+        # Ergebnisse früherer Züge bleiben erhalten, ältere Einträge werden aber bevorzugt ersetzt
+        self.transposition_table.new_search()
+        self.move_ordering.clear()
         self.identity = player
         self.nodes, self.alpha_cuts, self.beta_cuts = 0, 0, 0
+        self.current_score, self.current_depth = 0, 0
 
-        self.evaluation_thread = threading.Thread(target=self.iterative_deepening, args=[max_depth])
-        self.evaluation_thread.start()
+        # Buchstellungen werden ohne Suche beantwortet
+        book_move = self.book.lookup(position, player)
+        if book_move is not None:
+            self.current_result = book_move
+            print(f'book move: {book_move}')
+            return True
+        return False
 
     def stop_evaluation(self):
         """
@@ -52,80 +133,341 @@ class AlphaBetaEngine:
         """
         return self.current_result
 
+    def search(self, max_depth=20):
+        """
+        Sucht zuerst per Threat-Space Suche nach einem erzwungenen Gewinn, sonst mit Alpha-Beta.
+        """
+        if self.stats is not None:
+            self.stats.attach_alpha_beta(self)
+        if self.time_control is not None:
+            self.move_timer = MoveTimer(self.time_control, bin(self.game_state.occupied()).count('1'), self.stop_event)
+            # Falls die Zeit schon vor der ersten Tiefe abläuft
+            row, col, _ = next(self.game_state.iter_moves())
+            self.current_result = (row, col)
+        try:
+            if self.threat_nodes:
+                threat_time = self.threat_time if self.move_timer is None else self.move_timer.threat_time(self.threat_time)
+                line = find_forced_win(self.game_state, self.identity, self.threat_nodes, threat_time, self.stop_event)
+                if line is not None:
+                    self.current_result = line[0]
+                    self.current_score = self.identity * Evaluator.WIN
+                    self.current_depth = len(line)
+                    return
+            if self.move_timer is not None:
+                self.move_timer.begin()
+            if self.interior_threat_nodes:
+                self.leaf_solver = ThreatSearch(self.game_state, self.interior_threat_nodes, self.threat_time, self.stop_event)
+
+            if self.workers <= 1:
+                keys = self.load_analysis(self.transposition_table)
+                self.iterative_deepening(max_depth)
+                self.save_analysis(self.transposition_table, keys)
+            else:
+                self.lazy_smp(max_depth)
+        finally:
+            if self.move_timer is not None:
+                self.move_timer.finish()
+                self.move_timer = None
+            if self.stats is not None:
+                self.stats.detach()
+                self.stats.emit('done')
+
+    def shallow_keys(self) -> list:
+        """
+        Kanonische Hashes der Wurzel und der Stellungen nach jedem Kandidatenzug.
+        """
+        keys = [self.game_state.canonical_key()[0]]
+        for row, col, _ in self.game_state.get_sorted_moves():
+            self.game_state.make_move(row, col)
+            keys.append(self.game_state.canonical_key()[0])
+            self.game_state.undo_move()
+        return keys
+
+    def load_analysis(self, table) -> list:
+        """
+        Liest die gespeicherten Ergebnisse der flachen Stellungen in einer Abfrage aus dem Analyse-Speicher und
+        legt sie in table ab. Gibt die Schlüssel für save_analysis zurück.
+        """
+        if self.analysis_store is None:
+            return []
+        keys = self.shallow_keys()
+        entries = self.analysis_store.load(keys)
+        for key, (score, depth, flag, move) in entries.items():
+            table.store(key, depth, flag, score, move)
+        print(f'analysis store: {len(entries)} of {len(keys)} positions loaded')
+        return keys
+
+    def save_analysis(self, table, keys) -> None:
+        """
+        Schreibt die Einträge von table zu keys mit ausreichender Tiefe in den Analyse-Speicher.
+        """
+        if self.analysis_store is None or not keys:
+            return
+        entries = {}
+        for key in keys:
+            entry = table.probe(key)
+            if entry is not None and entry[1] >= self.analysis_store.min_depth:
+                entries[key] = entry
+        self.analysis_store.save(entries)
+
     def is_terminal(self, score):
         return score >= Evaluator.WIN or score <= -Evaluator.WIN
 
-    def iterative_deepening(self, max_depth=10):
+    def iterative_deepening(self, max_depth=10, start_depth=1):
         """
         Nutzt Iterative Deepening um für jede Tiefe den besten Zug zu finden.
         Terminiert entweder wenn maximale Tiefe erreicht wurde oder
-        wenn von GUI das Stoppsignal kommt.
+        wenn von GUI das Stoppsignal kommt. Mit Zeitkontrolle entscheidet self.move_timer nach jeder Tiefe,
+        ob die nächste begonnen wird.
         """
-        d = 1
+        d = start_depth
+        scores = []
 
         while d <= max_depth and not self.stop_event.is_set():
-            score, move = self.alpha_beta(1, d, self.identity)
-            print(score, move)
-            self.current_result = move
-            print(
-                f'depth: {d}, move: {move}, eval: {score}, nodes: {self.nodes}, alpha-cuts: {self.alpha_cuts}, beta-cuts: {self.beta_cuts}')
+            score, move = self.aspiration_search(d, scores[-2] if len(scores) >= 2 else None)
+            if self.stop_event.is_set():
+                break
+            self.report(d, score, move)
+            if self.move_timer is not None and not self.move_timer.next_iteration(move, self.is_terminal(score)):
+                break
+            scores.append(score)
             d += 1
 
-    def alpha_beta(self, depth: int, remaining_depth, player: int, alpha: int = float('-inf'),
-                   beta: int = float('inf')):
-        if self.game_state.zobrist_hash in self.transposition_table:
-            score, move, saved_at_depth = self.transposition_table[self.game_state.zobrist_hash]
-            if saved_at_depth >= remaining_depth:
+    def aspiration_search(self, remaining_depth, previous):
+        """
+        Sucht die Wurzel zunächst in einem Fenster um die Bewertung previous der vorherigen Tiefe. Liegt das
+        Ergebnis außerhalb, wird das Fenster auf dieser Seite vergrößert und erneut gesucht.
+        """
+        if previous is None or self.is_terminal(previous):
+            return self.alpha_beta(1, remaining_depth, self.identity)
+
+        lower = upper = ASPIRATION_WINDOW
+        while True:
+            alpha = previous - lower if lower < ASPIRATION_LIMIT else float('-inf')
+            beta = previous + upper if upper < ASPIRATION_LIMIT else float('inf')
+            score, move = self.alpha_beta(1, remaining_depth, self.identity, alpha, beta)
+            if score is None:
+                return score, move
+            if score <= alpha:
+                lower *= ASPIRATION_GROWTH
+            elif score >= beta:
+                upper *= ASPIRATION_GROWTH
+            else:
                 return score, move
 
-        best_move = None
-        if remaining_depth == 0 or self.is_terminal(self.game_state.get_heuristic_value()):
-            return self.game_state.get_heuristic_value(), best_move
+    def report(self, depth, score, move):
+        """
+        Wird nach jeder vollständig durchsuchten Tiefe aufgerufen.
+        """
+        print(score, move)
+        self.current_result = move
+        self.current_score = score
+        self.current_depth = depth
+        print(
+            f'depth: {depth}, move: {move}, eval: {score}, nodes: {self.nodes}, alpha-cuts: {self.alpha_cuts}, beta-cuts: {self.beta_cuts}')
 
-        if player == Piece.BLACK.value:
-            b = float('-inf')
-            for row, col, t in self.game_state.get_sorted_moves():
-                self.nodes += 1
-                self.game_state.make_move(row, col)
-                score, move = self.alpha_beta(depth + 1, remaining_depth - 1, -player, alpha, beta)
-                self.game_state.undo_move()
+    def lazy_smp(self, max_depth=10):
+        """
+        Lazy-SMP: self.workers Prozesse durchsuchen dieselbe Stellung mit Iterative Deepening und teilen sich
+        eine Transpositionstabelle in Shared Memory. Die Prozesse mit ungerader Nummer beginnen eine Tiefe
+        weiter, so dass sie den anderen vorauslaufen und deren Suche über die Tabelle beschleunigen.
+        Als Ergebnis gilt der Zug der tiefsten vollständig durchsuchten Iteration. Sobald ein Prozess max_depth
+        oder ein entschiedenes Ergebnis erreicht, werden alle Prozesse gestoppt.
+        Das Stoppsignal der GUI wird an alle Prozesse weitergegeben.
+        """
+        context = multiprocessing.get_context('spawn')
+        shared = shared_memory.SharedMemory(create=True, size=table_size(self.tt_size_mb)[1])
+        table = TranspositionTable(self.tt_size_mb, shared.buf)
+        keys = self.load_analysis(table)
+        stop = context.RawValue('b', 0)
+        results = context.Queue()
+        position = [row[:] for row in self.game_state.board]
+        processes = [context.Process(target=lazy_smp_worker, daemon=True,
+                                     args=(i, position, self.identity, max_depth, shared.name, self.tt_size_mb, stop, results))
+                     for i in range(self.workers)]
 
+        start = time.perf_counter()
+        worker_nodes = [0] * self.workers
+        worker_times = [0.0] * self.workers
+        best_depth = 0
+        done = 0
+        try:
+            for process in processes:
+                process.start()
+            while done < self.workers:
                 if self.stop_event.is_set():
-                    return None, None
-
-                if score > b:
-                    b = score
-                    best_move = row, col
-                    if score >= self.game_state.evaluator.WIN:
+                    stop.value = 1
+                try:
+                    kind, worker_id, depth, score, move, nodes, elapsed = results.get(timeout=0.05)
+                except queue.Empty:
+                    if not any(process.is_alive() for process in processes):
                         break
+                    continue
 
-                if b >= beta:
-                    self.beta_cuts += 1
-                    return b, best_move
+                worker_nodes[worker_id] = nodes
+                worker_times[worker_id] = elapsed
+                self.nodes = sum(worker_nodes)
+                if kind == 'done':
+                    done += 1
+                elif depth > best_depth:
+                    best_depth = depth
+                    self.current_result = move
+                    self.current_score = score
+                    self.current_depth = depth
+                    print(f'depth: {depth}, move: {move}, eval: {score}, nodes: {self.nodes}, worker: {worker_id}, '
+                          f'nodes/sec: {self.nodes / (time.perf_counter() - start):.0f}')
+                    # Maximaltiefe oder Gewinn/Verlust erreicht: das Ergebnis steht fest, die übrigen Prozesse
+                    # werden gestoppt statt auf den langsamsten zu warten
+                    if depth >= max_depth or self.is_terminal(score):
+                        stop.value = 1
+                    elif self.move_timer is not None and not self.move_timer.next_iteration(move, False):
+                        stop.value = 1
+        finally:
+            stop.value = 1
+            for process in processes:
+                process.join()
+            self.save_analysis(table, keys)
+            table.release()
+            shared.close()
+            shared.unlink()
+
+        self.nodes_per_second = self.nodes / (time.perf_counter() - start)
+        self.worker_nodes_per_second = [n / t if t > 0 else 0 for n, t in zip(worker_nodes, worker_times)]
+        print(f'workers: {self.workers}, nodes: {self.nodes}, nodes/sec: {self.nodes_per_second:.0f}, '
+              f'per worker: {[round(n) for n in self.worker_nodes_per_second]}')
 
-                alpha = max(alpha, b)
+    def alpha_beta(self, depth: int, remaining_depth, player: int, alpha: int = float('-inf'),
+                   beta: int = float('inf')):
+        """
+        Bewertung und bester Zug aus Sicht von Schwarz im Fenster (alpha, beta). Die Suche selbst ist negamax,
+        player muss der Spieler am Zug sein.
+        """
+        if player == Piece.BLACK.value:
+            score, move = self.negamax(depth, remaining_depth, alpha, beta)
         else:
-            b = float('inf')
-            for row, col, t in self.game_state.get_sorted_moves():
-                self.nodes += 1
-                self.game_state.make_move(row, col)
-                score, move = self.alpha_beta(depth + 1, remaining_depth - 1, -player, alpha, beta)
-                self.game_state.undo_move()
+            score, move = self.negamax(depth, remaining_depth, -beta, -alpha)
+        if score is None:
+            return None, None
+        return player * score, move
 
-                if self.stop_event.is_set():
-                    return None, None
+    def negamax(self, depth: int, remaining_depth, alpha, beta):
+        """
+        Principal Variation Search: Bewertung aus Sicht des Spielers am Zug. Der erste Zug wird mit dem vollen
+        Fenster durchsucht, alle weiteren mit einem Nullfenster, das nur zeigt, ob sie besser als alpha sind.
+        Nur dann folgt eine zweite Suche mit dem vollen Fenster.
+        """
+        player = self.game_state.player
+        # Symmetrische Stellungen teilen sich einen Eintrag, Züge werden in kanonischer Orientierung gespeichert.
+        # Die Tabelle speichert Bewertungen aus Sicht von Schwarz.
+        zobrist_hash, transform = self.game_state.canonical_key()
+        entry = self.transposition_table.probe(zobrist_hash)
+        tt_move = None
+        if entry is not None:
+            score, saved_depth, flag, move = entry
+            # Auch aus flacheren Suchen ist der beste Zug der erste Kandidat der Zugsortierung
+            move = tt_move = divmod(SYMMETRIES[INVERSE_SYMMETRIES[transform]][move], 15) if move is not None else None
+            if saved_depth >= remaining_depth:
+                score *= player
+                if flag == EXACT:
+                    return score, move
+                elif (flag == LOWER_BOUND) == (player == Piece.BLACK.value):
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    return score, move
 
-                if score < b:
-                    b = score
-                    best_move = row, col
-                    if score <= -self.game_state.evaluator.WIN:
-                        break
+        best_move = None
+        if remaining_depth == 0 or self.is_terminal(self.game_state.get_heuristic_value()):
+            # An den Blättern kann optional eine kleine VCF-Suche einen erzwungenen Gewinn des Spielers am Zug erkennen
+            if (remaining_depth == 0 and self.leaf_solver is not None
+                    and not self.is_terminal(self.game_state.get_heuristic_value())
+                    and self.leaf_solver.vcf(player) is not None):
+                return Evaluator.WIN, best_move
+            return player * self.game_state.get_heuristic_value(), best_move
+
+        # Suchfenster nach dem Abgleich mit der Transpositionstabelle, um die Art der Schranke zu bestimmen
+        alpha_orig = alpha
 
-                if b <= alpha:
+        b = float('-inf')
+        for i, (row, col, source) in enumerate(self.move_ordering.iter_moves(self.game_state, depth, tt_move)):
+            self.nodes += 1
+            self.game_state.make_move(row, col)
+            if i == 0:
+                score, _ = self.negamax(depth + 1, remaining_depth - 1, -beta, -alpha)
+            else:
+                score, _ = self.negamax(depth + 1, remaining_depth - 1, -alpha - NULL_WINDOW, -alpha)
+                if score is not None and alpha < -score < beta:
+                    score, _ = self.negamax(depth + 1, remaining_depth - 1, -beta, -alpha)
+            self.game_state.undo_move()
+
+            if self.stop_event.is_set():
+                return None, None
+            score = -score
+
+            if score > b:
+                b = score
+                best_move = row, col
+                if score >= Evaluator.WIN:
+                    break
+
+            if b >= beta:
+                if player == Piece.BLACK.value:
+                    self.beta_cuts += 1
+                else:
                     self.alpha_cuts += 1
-                    return b, best_move
+                if self.stats is not None:
+                    self.stats.cutoff(i)
+                self.move_ordering.cutoff(depth, player, best_move, remaining_depth, i, source)
+                self.store(zobrist_hash, transform, remaining_depth, LOWER_BOUND, b, best_move)
+                return b, best_move
 
-                beta = min(beta, b)
+            alpha = max(alpha, b)
 
-        self.transposition_table[self.game_state.zobrist_hash] = b, best_move, depth
+        flag = UPPER_BOUND if b <= alpha_orig else EXACT if b < beta else LOWER_BOUND
+        self.store(zobrist_hash, transform, remaining_depth, flag, b, best_move)
         return b, best_move
+
+    def store(self, zobrist_hash, transform, remaining_depth, flag, score, move):
+        """
+        Speichert ein Suchergebnis unter dem kanonischen Hash in der Transpositionstabelle, den Zug abgebildet mit
+        der Symmetrie transform. Die Tiefe ist die verbleibende Suchtiefe. score und flag sind aus Sicht des
+        Spielers am Zug und werden für die Tabelle auf die Sicht von Schwarz umgerechnet.
+        """
+        if self.game_state.player != Piece.BLACK.value:
+            score = -score
+            if flag != EXACT:
+                flag = LOWER_BOUND if flag == UPPER_BOUND else UPPER_BOUND
+        self.transposition_table.store(zobrist_hash, remaining_depth, flag, score,
+                                       None if move is None else SYMMETRIES[transform][move[0] * 15 + move[1]])
+
+
+class LazySMPWorker(AlphaBetaEngine):
+    """
+    Suchprozess für AlphaBetaEngine.lazy_smp. Meldet jede vollständig durchsuchte Tiefe an den Koordinator.
+    """
+
+    def __init__(self, worker_id, results, board, player, transposition_table) -> None:
+        super().__init__(board, player, transposition_table=transposition_table)
+        self.worker_id = worker_id
+        self.results = results
+        self.start = time.perf_counter()
+
+    def report(self, depth, score, move):
+        self.current_result = move
+        self.results.put(('depth', self.worker_id, depth, score, move, self.nodes, time.perf_counter() - self.start))
+
+
+def lazy_smp_worker(worker_id, position, player, max_depth, shared_name, tt_size_mb, stop, results):
+    # Die Worker teilen sich den Resource-Tracker des Koordinators, der den Speicher mit unlink freigibt
+    shared = shared_memory.SharedMemory(name=shared_name)
+    table = TranspositionTable(tt_size_mb, shared.buf)
+
+    engine = LazySMPWorker(worker_id, results, position, player, table)
+    engine.stop_event = SharedStopFlag(stop)
+
+    engine.iterative_deepening(max_depth, start_depth=1 + worker_id % 2)
+    results.put(('done', worker_id, None, None, None, engine.nodes, time.perf_counter() - engine.start))
+
+    table.release()
+    shared.close()
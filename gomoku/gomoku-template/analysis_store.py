@@ -0,0 +1,123 @@
+import os
+import sqlite3
+from pattern_table import EVALUATOR_VERSION, MAGIC
+from zobrist import BLACK_KEYS
+
+"""
+In dieser Datei ist der persistente Analyse-Speicher implementiert.
+
+Ergebnisse tiefer Suchen (Bewertung, Art der Schranke, Tiefe und bester Zug) werden je Zobrist-Hash in einer
+SQLite-Datenbank gespeichert und bleiben über Engine-Instanzen und Programmstarts hinweg erhalten.
+Die Alpha-Beta Engine liest zu Beginn einer Suche die Einträge der Wurzel und der flachen Ebenen in einer
+Abfrage und legt sie in der Transpositionstabelle ab. Am Ende schreibt sie die Einträge dieser Stellungen mit
+mindestens min_depth verbleibender Tiefe in einer Transaktion zurück. Während der Suche wird nicht auf die
+Datenbank zugegriffen.
+
+Die Schlüssel sind 64-Bit Hashes ohne Vorzeichen und werden für SQLite in vorzeichenbehaftete Werte umgerechnet.
+
+Die Tabelle meta hält die Version der gespeicherten Ergebnisse (siehe version): Format der Pattern-Tabelle,
+Version der Bewertung und der erste Zobrist-Schlüssel, der für den Seed steht. Passt sie beim Öffnen nicht zur
+laufenden Engine, werden alle Ergebnisse verworfen, da ihre Bewertungen bzw. Schlüssel nicht mehr gelten.
+"""
+
+STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'analysis.sqlite')
+DEFAULT_MIN_DEPTH = 3
+# SQLite erlaubt nur eine begrenzte Anzahl Parameter je Abfrage
+BATCH_SIZE = 500
+
+
+def version() -> dict:
+    """
+    Version der Ergebnisse der laufenden Engine als {name: value}.
+    """
+    return {
+        'pattern_table': MAGIC.decode(),
+        'evaluator': f'{EVALUATOR_VERSION:016x}',
+        'zobrist': f'{BLACK_KEYS[0]:016x}',
+    }
+
+
+def _to_signed(key: int) -> int:
+    return key - (1 << 64) if key >= 1 << 63 else key
+
+
+def _to_unsigned(key: int) -> int:
+    return key + (1 << 64) if key < 0 else key
+
+
+class AnalysisStore:
+
+    def __init__(self, path: str = STORE_PATH, min_depth: int = DEFAULT_MIN_DEPTH) -> None:
+        self.path = path
+        # Nur Ergebnisse mit mindestens dieser verbleibenden Tiefe werden gespeichert
+        self.min_depth = min_depth
+        # Die Engine greift aus ihrem Evaluations-Thread zu, aber nie gleichzeitig aus mehreren Threads
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS analysis (key INTEGER PRIMARY KEY, depth INTEGER, '
+                                'flag INTEGER, score REAL, move INTEGER)')
+        self.connection.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)')
+        self.connection.commit()
+        self.check_version()
+
+        # Statistiken
+        self.reads = 0
+        self.hits = 0
+        self.writes = 0
+
+    def check_version(self) -> None:
+        """
+        Verwirft alle Ergebnisse, wenn die gespeicherte Version nicht zur laufenden Engine passt.
+        """
+        current = version()
+        stored = dict(self.connection.execute('SELECT name, value FROM meta'))
+        if stored == current:
+            return
+        with self.connection:
+            self.connection.execute('DELETE FROM analysis')
+            self.connection.execute('DELETE FROM meta')
+            self.connection.executemany('INSERT INTO meta (name, value) VALUES (?, ?)', current.items())
+
+    def __len__(self) -> int:
+        return self.connection.execute('SELECT COUNT(*) FROM analysis').fetchone()[0]
+
+    def load(self, keys) -> dict:
+        """
+        Liest die Einträge zu keys in Blöcken von BATCH_SIZE Schlüsseln.
+        Gibt {key: (score, depth, flag, move)} mit move als Feld-Index oder None zurück.
+        """
+        keys = list({_to_signed(key) for key in keys})
+        entries = {}
+        for start in range(0, len(keys), BATCH_SIZE):
+            batch = keys[start:start + BATCH_SIZE]
+            rows = self.connection.execute(
+                f'SELECT key, score, depth, flag, move FROM analysis WHERE key IN ({",".join("?" * len(batch))})', batch)
+            for key, score, depth, flag, move in rows:
+                entries[_to_unsigned(key)] = (score, depth, flag, move)
+        self.reads += len(keys)
+        self.hits += len(entries)
+        return entries
+
+    def save(self, entries: dict) -> None:
+        """
+        Schreibt {key: (score, depth, flag, move)} in einer Transaktion. Vorhandene Einträge werden nur durch
+        mindestens gleich tiefe Ergebnisse ersetzt, Einträge unter min_depth werden ignoriert.
+        """
+        rows = [(_to_signed(key), depth, flag, score, move)
+                for key, (score, depth, flag, move) in entries.items() if depth >= self.min_depth]
+        with self.connection:
+            self.connection.executemany(
+                'INSERT INTO analysis (key, depth, flag, score, move) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET depth = excluded.depth, flag = excluded.flag, '
+                'score = excluded.score, move = excluded.move WHERE excluded.depth >= analysis.depth', rows)
+        self.writes += len(rows)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def get_statistics(self) -> dict:
+        return {
+            'reads': self.reads,
+            'hits': self.hits,
+            'writes': self.writes,
+            'hit_rate': self.hits / self.reads if self.reads else 0.0,
+        }
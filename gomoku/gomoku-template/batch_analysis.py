@@ -0,0 +1,235 @@
+import argparse
+import collections
+import contextlib
+import json
+import multiprocessing
+import os
+import struct
+import sys
+import time
+from constants import Piece
+from time_control import TimeControl
+from tournament import ENGINES, parse_spec
+from benchmarks.corpus import position as replay
+
+"""
+In dieser Datei ist die Batch-Analyse von Stellungen implementiert.
+
+Die Stellungen werden als Strom gelesen (JSON-Zeilen oder ein kompaktes Binärformat) und in einem Prozess-Pool
+bewertet. Jeder Prozess erzeugt seine Engine einmal und verwendet sie für alle seine Stellungen. Die Ergebnisse
+werden in der Reihenfolge der Eingabe als JSON-Zeilen geschrieben. Es sind nie mehr als max_pending Stellungen
+gleichzeitig unterwegs, der Speicherbedarf hängt also nicht von der Länge der Eingabe ab.
+
+JSON-Zeile je Stellung, alle Felder außer board bzw. moves optional:
+    {"id": "a1", "board": [[0, 1, -1, ...], ...], "player": 1, "depth": 6, "time": 0.5}
+    {"moves": [[7, 7], [7, 8]], "iterations": 2000}
+board enthält 0 (frei), 1 (Schwarz) und -1 (Weiß), moves eine Zugfolge ab dem leeren Brett. Ohne player ist bei
+gleich vielen Steinen Schwarz am Zug, sonst Weiß. depth (Alpha-Beta) bzw. iterations (MCTS) und time (Sekunden
+je Stellung) überschreiben die Vorgaben der Engine-Spezifikation.
+
+Ergebnis je Stellung: index (Position in der Eingabe), id, move als [Zeile, Spalte], time in Sekunden und
+für Alpha-Beta score (aus Sicht von Schwarz), depth und nodes, für MCTS score, visits und simulations
+(siehe analyse der Engines). Fehlerhafte Eingaben ergeben {"index": ..., "error": ...}.
+
+Binärformat: Datensätze zu RECORD.size Bytes (siehe RECORD), Felder 0 frei, 1 Schwarz, 2 Weiß; player, limit
+(Tiefe bzw. Simulationen) und time 0 bedeuten "nicht angegeben".
+
+Alpha-Beta Spezifikationen brauchen depth oder move_time, Vorgabe ist DEFAULT_ENGINE.
+
+    python batch_analysis.py positions.jsonl --engine alpha-beta:depth=4 --processes 4 --output results.jsonl
+"""
+
+# Felder (Zeile für Zeile), Spieler am Zug, Tiefe bzw. Simulationen, Zeit in Sekunden
+RECORD = struct.Struct('<225sbHf')
+CELLS = {0: 0, 1: Piece.BLACK.value, 2: Piece.WHITE.value}
+CODES = {piece: code for code, piece in CELLS.items()}
+# Vorgabe für max_pending je Prozess
+PENDING_PER_PROCESS = 4
+# Ohne depth oder move_time würde Alpha-Beta bis Tiefe 20 suchen, die Vorgabe ist daher begrenzt
+DEFAULT_ENGINE = 'alpha-beta:depth=4'
+
+# Engine des Worker-Prozesses
+_engine = None
+_spec = None
+
+
+def read_jsonl(stream):
+    """
+    Liest Stellungen aus JSON-Zeilen. Fehlerhafte Zeilen werden als Aufgabe mit 'error' geliefert.
+    """
+    index = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            if 'board' in record:
+                board = record['board']
+            elif 'moves' in record:
+                board, _ = replay(record['moves'])
+            else:
+                raise ValueError('either board or moves is required')
+            limit = record.get('depth', record.get('iterations'))
+            yield make_task(index, record.get('id'), board, record.get('player'), limit, record.get('time'))
+        except (ValueError, TypeError, KeyError, IndexError) as error:
+            yield {'index': index, 'error': str(error)}
+        index += 1
+
+
+def read_binary(stream):
+    """
+    Liest Stellungen im Binärformat, siehe RECORD.
+    """
+    index = 0
+    while True:
+        data = stream.read(RECORD.size)
+        if len(data) < RECORD.size:
+            if data:
+                yield {'index': index, 'error': 'truncated record'}
+            return
+        cells, player, limit, seconds = RECORD.unpack(data)
+        try:
+            board = [[CELLS[cells[row * 15 + col]] for col in range(15)] for row in range(15)]
+            yield make_task(index, None, board, player or None, limit or None, seconds or None)
+        except (ValueError, KeyError) as error:
+            yield {'index': index, 'error': str(error)}
+        index += 1
+
+
+def write_binary(stream, board, player: int = 0, limit: int = 0, seconds: float = 0.0) -> None:
+    """
+    Schreibt eine Stellung im Binärformat.
+    """
+    cells = bytes(CODES[board[row][col]] for row in range(15) for col in range(15))
+    stream.write(RECORD.pack(cells, player, limit, seconds))
+
+
+def make_task(index: int, identifier, board, player, limit, seconds) -> dict:
+    if len(board) != 15 or any(len(row) != 15 for row in board):
+        raise ValueError('board must be 15x15')
+    if any(cell not in CODES for row in board for cell in row):
+        raise ValueError('board cells must be 0, 1 or -1')
+    if player is None:
+        black = sum(row.count(Piece.BLACK.value) for row in board)
+        white = sum(row.count(Piece.WHITE.value) for row in board)
+        player = Piece.BLACK.value if black == white else Piece.WHITE.value
+    if player not in (Piece.BLACK.value, Piece.WHITE.value):
+        raise ValueError(f'invalid player {player}')
+    task = {'index': index, 'board': board, 'player': player, 'limit': limit, 'time': seconds}
+    if identifier is not None:
+        task['id'] = identifier
+    return task
+
+
+def init_worker(spec: str) -> None:
+    """
+    Erzeugt die Engine des Worker-Prozesses.
+    """
+    global _engine, _spec
+    kind, _, constructor = parse_spec(spec)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        _engine = ENGINES[kind](**constructor)
+    _spec = spec
+
+
+def analyse_task(task: dict) -> dict:
+    """
+    Bewertet eine Stellung mit der Engine des Worker-Prozesses.
+    """
+    kind, search, _ = parse_spec(_spec)
+    limit = task['limit'] if task['limit'] is not None else search.get('depth' if kind == 'alpha-beta' else 'iterations')
+    seconds = task['time'] if task['time'] is not None else search.get('move_time')
+    arguments = {}
+    if limit is not None:
+        arguments['max_depth' if kind == 'alpha-beta' else 'iterations'] = limit
+    if seconds is not None:
+        arguments['time_control'] = TimeControl(move_time=seconds)
+
+    start = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        result = _engine.analyse(task['board'], task['player'], **arguments)
+    result['move'] = list(result['move'])
+    result['time'] = time.perf_counter() - start
+    return {'index': task['index'], **({'id': task['id']} if 'id' in task else {}), **result}
+
+
+def check_spec(spec: str) -> None:
+    """
+    Prüft die Spezifikation. Alpha-Beta braucht depth oder move_time als Vorgabe für Stellungen ohne eigene Grenze.
+    """
+    kind, search, _ = parse_spec(spec)
+    if kind == 'alpha-beta' and 'depth' not in search and 'move_time' not in search:
+        raise ValueError(f'{spec!r} needs depth or move_time, e.g. {DEFAULT_ENGINE!r}')
+
+
+def analyse_stream(tasks, spec: str = DEFAULT_ENGINE, processes: int = None, max_pending: int = None):
+    """
+    Bewertet die Stellungen aus dem Iterator tasks und liefert die Ergebnisse in derselben Reihenfolge.
+    tasks wird nur so weit gelesen, dass höchstens max_pending Stellungen auf ihr Ergebnis warten.
+    """
+    check_spec(spec)
+    processes = processes or os.cpu_count()
+    max_pending = max_pending or PENDING_PER_PROCESS * processes
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(processes, initializer=init_worker, initargs=(spec,)) as pool:
+        pending = collections.deque()
+        for task in tasks:
+            # Fehlerhafte Eingaben werden ohne Worker an ihrer Stelle durchgereicht
+            pending.append(task if 'error' in task else (task['index'], pool.apply_async(analyse_task, (task,))))
+            while len(pending) >= max_pending:
+                yield collect(pending.popleft())
+        while pending:
+            yield collect(pending.popleft())
+
+
+def collect(entry) -> dict:
+    """
+    Wartet auf das Ergebnis einer Stellung. Ein Fehler im Worker ergibt wie eine fehlerhafte Eingabe einen
+    Eintrag mit 'error', der Strom läuft weiter.
+    """
+    if isinstance(entry, dict):
+        return entry
+    index, result = entry
+    try:
+        return result.get()
+    except Exception as error:
+        return {'index': index, 'error': str(error)}
+
+
+def open_input(path: str, binary: bool):
+    if path == '-':
+        return contextlib.nullcontext(sys.stdin.buffer if binary else sys.stdin)
+    return open(path, 'rb' if binary else 'r')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Batch-Analyse von Stellungen.')
+    parser.add_argument('input', help='JSON-Zeilen oder Binärdatei, - für stdin')
+    parser.add_argument('--format', choices=('jsonl', 'binary'), default=None,
+                        help='Eingabeformat, ohne Angabe binary für Dateien mit Endung .bin')
+    parser.add_argument('--engine', default=DEFAULT_ENGINE, help='Spezifikation "engine:key=value,..."')
+    parser.add_argument('--output', default='-', help='Ergebnisse als JSON-Zeilen, - für stdout')
+    parser.add_argument('--processes', type=int, default=None, help='Größe des Prozess-Pools')
+    parser.add_argument('--max-pending', type=int, default=None, help='Höchstens so viele Stellungen gleichzeitig')
+    args = parser.parse_args()
+    binary = args.format == 'binary' or (args.format is None and args.input.endswith('.bin'))
+    try:
+        check_spec(args.engine)
+    except ValueError as error:
+        parser.error(str(error))
+
+    start, count = time.perf_counter(), 0
+    with contextlib.ExitStack() as stack:
+        stream = stack.enter_context(open_input(args.input, binary))
+        output = sys.stdout if args.output == '-' else stack.enter_context(open(args.output, 'w'))
+        tasks = read_binary(stream) if binary else read_jsonl(stream)
+        for result in analyse_stream(tasks, args.engine, args.processes, args.max_pending):
+            output.write(json.dumps(result) + '\n')
+            output.flush()
+            count += 1
+    elapsed = time.perf_counter() - start
+    print(f'{count} positions in {elapsed:.1f}s ({count / elapsed:.2f} positions/sec)', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
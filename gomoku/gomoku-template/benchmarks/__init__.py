@@ -0,0 +1,4 @@
+"""
+Benchmark-Suite für die Engines, den Evaluator und GameState (siehe suite.py, Stellungen in corpus.py).
+Wird aus dem Verzeichnis gomoku-template mit `python -m benchmarks` gestartet.
+"""
@@ -0,0 +1,39 @@
+import argparse
+import json
+import sys
+from benchmarks.suite import BENCHMARKS, compare, run
+
+"""
+Aufruf aus gomoku-template:
+    python -m benchmarks --output results.json
+    python -m benchmarks --baseline baseline.json --tolerance 0.1
+Mit --baseline werden Regressionen markiert und der Exit-Code ist 1, wenn es welche gibt.
+"""
+
+parser = argparse.ArgumentParser(description='Benchmarks der Engines, des Evaluators und von GameState.')
+parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), help='nur diese Benchmarks ausführen')
+parser.add_argument('--quick', action='store_true', help='kürzere Messungen und Suchen')
+parser.add_argument('--output', help='Ergebnis als JSON in diese Datei schreiben (sonst auf stdout)')
+parser.add_argument('--baseline', help='JSON-Datei eines früheren Laufs zum Vergleich')
+parser.add_argument('--tolerance', type=float, default=0.1, help='erlaubte relative Verschlechterung')
+args = parser.parse_args()
+
+results = run(args.only, args.quick)
+if args.output:
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+else:
+    json.dump(results, sys.stdout, indent=2)
+    print()
+
+if args.baseline:
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    rows = compare(results, baseline, args.tolerance)
+    regressions = 0
+    for metric, base, value, change, regression in rows:
+        regressions += regression
+        print(f'{"REGRESSION" if regression else "ok":10} {metric:55} {base:14.2f} {value:14.2f} {change:+8.1%}',
+              file=sys.stderr)
+    print(f'{regressions} regressions in {len(rows)} metrics (tolerance {args.tolerance:.0%})', file=sys.stderr)
+    sys.exit(1 if regressions else 0)
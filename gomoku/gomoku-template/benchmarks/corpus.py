@@ -0,0 +1,89 @@
+from constants import Piece
+from rules import winning_line
+
+"""
+Fester Stellungskorpus der Benchmarks.
+
+Jede Stellung ist eine Zugfolge (row, col) ab dem leeren Brett, Schwarz beginnt. Die Stellungen dürfen nicht
+verändert werden, sonst sind Ergebnisse nicht mehr mit einer gespeicherten Baseline vergleichbar.
+    opening:  frühe Stellungen, teilweise symmetrisch
+    midgame:  Stellungen nach 16 bzw. 24 Halbzügen, in denen keine Seite mit einem Zug fünf erreicht
+    tactical: der Spieler am Zug hat einen erzwungenen Gewinn durch Vieren (VCF)
+"""
+
+POSITIONS = {
+    'opening': {
+        'empty': [],
+        'center': [(7, 7)],
+        'opening-4': [(7, 7), (5, 5), (5, 7), (8, 7)],
+        'opening-8': [(7, 7), (7, 8), (8, 8), (6, 6), (8, 7), (6, 8), (9, 9), (5, 5)],
+    },
+    'midgame': {
+        'midgame-16a': [(7, 7), (6, 6), (5, 7), (8, 7), (7, 6), (7, 9), (7, 5), (6, 7), (7, 3), (6, 8), (6, 5), (5, 5),
+                        (6, 9), (7, 4), (3, 3), (4, 3)],
+        'midgame-16b': [(7, 7), (6, 6), (5, 7), (8, 7), (6, 7), (7, 8), (5, 10), (7, 6), (8, 6), (5, 9), (9, 8), (6, 8),
+                        (4, 8), (4, 7), (10, 5), (3, 8)],
+        'midgame-16c': [(7, 7), (5, 5), (5, 7), (8, 7), (3, 5), (2, 4), (4, 4), (5, 3), (5, 4), (7, 5), (6, 5), (7, 4),
+                        (6, 4), (6, 7), (7, 3), (6, 3)],
+        'midgame-24': [(7, 7), (6, 6), (5, 7), (8, 7), (7, 6), (7, 9), (7, 5), (6, 7), (7, 3), (6, 8), (6, 5), (5, 5),
+                       (6, 9), (7, 4), (3, 3), (4, 3), (6, 4), (4, 2), (4, 4), (6, 2), (8, 6), (9, 7), (3, 4), (9, 5)],
+    },
+    'tactical': {
+        'vcf-5a': [(7, 7), (5, 7), (6, 6), (9, 9), (5, 5), (8, 8), (4, 6), (5, 6), (3, 3), (3, 7), (6, 4), (8, 2), (6, 5),
+                   (6, 7), (4, 7), (6, 3), (7, 8), (4, 4), (4, 5), (3, 5)],
+        'vcf-7': [(7, 7), (5, 5), (5, 7), (6, 7), (6, 8), (3, 5), (4, 5), (7, 9), (6, 6), (7, 5), (5, 9), (9, 5), (5, 8),
+                  (8, 6), (5, 11), (6, 4), (5, 3), (4, 10), (9, 7), (3, 7), (7, 3), (3, 8), (3, 6), (6, 3), (5, 6), (2, 6),
+                  (8, 8), (9, 8)],
+        'vcf-9': [(7, 7), (5, 5), (7, 5), (7, 8), (6, 6), (5, 7), (7, 6), (7, 4), (5, 4), (8, 7), (9, 6), (8, 6), (6, 5),
+                  (3, 2), (8, 5), (5, 6), (6, 4), (6, 7), (4, 5)],
+    },
+}
+
+
+def position(moves: list) -> tuple[list[list[int]], int]:
+    """
+    Gibt das Brett nach der Zugfolge und den Spieler am Zug zurück.
+    """
+    board = [[0] * 15 for _ in range(15)]
+    player = Piece.BLACK.value
+    for row, col in moves:
+        board[row][col] = player
+        player = -player
+    return board, player
+
+
+def iter_positions(categories=None):
+    """
+    Liefert (Kategorie, Name, Brett, Spieler am Zug) für alle Stellungen der Kategorien (alle bei None).
+    """
+    for category, positions in POSITIONS.items():
+        if categories is None or category in categories:
+            for name, moves in positions.items():
+                board, player = position(moves)
+                yield category, name, board, player
+
+
+def immediate_fives(board) -> list:
+    """
+    Gibt alle (row, col, player) zurück, mit denen ein Spieler durch einen Zug fünf in einer Reihe erreicht.
+    """
+    fives = []
+    for row in range(15):
+        for col in range(15):
+            if board[row][col] != 0:
+                continue
+            for player in (Piece.BLACK.value, Piece.WHITE.value):
+                board[row][col] = player
+                if winning_line(board, row, col, player) is not None:
+                    fives.append((row, col, player))
+            board[row][col] = 0
+    return fives
+
+
+def check_positions() -> None:
+    """
+    Prüft den Korpus: Eröffnungs- und Mittelspielstellungen sollen die Suche messen, kein Fünf in einem Zug.
+    """
+    for category, name, board, _ in iter_positions(('opening', 'midgame')):
+        fives = immediate_fives(board)
+        assert not fives, f'{category} position {name} has an immediate five: {fives}'
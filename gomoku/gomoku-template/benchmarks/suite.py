@@ -0,0 +1,204 @@
+import contextlib
+import io
+import platform
+import random
+import time
+from alpha_beta_engine import AlphaBetaEngine
+from evaluator import Evaluator
+from game_state import GameState
+from mcts import MonteCarloEngine
+from rollout import BatchRollout
+from benchmarks.corpus import check_positions, iter_positions
+
+"""
+In dieser Datei sind die einzelnen Benchmarks und der Vergleich mit einer Baseline implementiert.
+
+Jeder Benchmark gibt ein flaches Dict {Metrik: Wert} zurück. Die Richtung einer Metrik ergibt sich aus ihrem
+Namen: Metriken auf '_per_sec' sind besser, wenn sie größer werden, alle anderen (Latenzen und Knotenzahlen)
+sind besser, wenn sie kleiner werden. Die Ausgaben der Engines werden während der Messung verworfen.
+"""
+
+SEED = 1234
+# Tiefe der Alpha-Beta Suche und Simulationen der MCTS je Stellung
+ALPHA_BETA_DEPTH = 4
+MCTS_ITERATIONS = 300
+MCTS_BATCH_SIZE = 32
+# Messdauer der Mikro-Benchmarks in Sekunden, gemessen wird die beste von REPEATS Runden
+DURATION = 0.5
+REPEATS = 3
+
+
+@contextlib.contextmanager
+def quiet():
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def measure(run, duration: float = DURATION, repeats: int = REPEATS) -> float:
+    """
+    Ruft run() wiederholt für etwa duration Sekunden auf und gibt die beste Rate (Operationen pro Sekunde)
+    aus repeats Runden zurück. run gibt die Anzahl Operationen eines Aufrufs zurück.
+    """
+    best = 0.0
+    for _ in range(repeats):
+        operations = 0
+        start = time.perf_counter()
+        elapsed = 0.0
+        while elapsed < duration:
+            operations += run()
+            elapsed = time.perf_counter() - start
+        best = max(best, operations / elapsed)
+    return best
+
+
+def bench_evaluator(duration: float = DURATION) -> dict:
+    """
+    Evaluator.evaluate auf allen besetzten Feldern des Korpus.
+    """
+    evaluator = Evaluator()
+    calls = [(board, row, col, board[row][col]) for _, _, board, _ in iter_positions()
+             for row in range(15) for col in range(15) if board[row][col] != 0]
+
+    def run():
+        for board, row, col, player in calls:
+            evaluator.evaluate(board, row, col, player)
+        return len(calls)
+
+    return {'evaluator.evaluate_per_sec': measure(run, duration)}
+
+
+def bench_game_state(duration: float = DURATION) -> dict:
+    """
+    make_move/undo_move Paare und die Latenz von get_sorted_moves, einmal ohne und einmal mit Cache-Treffer.
+    """
+    states = [GameState(board, player) for _, _, board, player in iter_positions()]
+    moves = [[(row, col) for row, col, _ in state.get_sorted_moves()] for state in states]
+
+    def make_undo():
+        count = 0
+        for state, candidates in zip(states, moves):
+            for row, col in candidates:
+                state.make_move(row, col)
+                state.undo_move()
+            count += len(candidates)
+        return count
+
+    def sorted_moves_cold():
+        for state in states:
+            state.sorted_moves.clear()
+            state.stale = state.active
+            state.get_sorted_moves()
+        return len(states)
+
+    def sorted_moves_cached():
+        for state in states:
+            state.get_sorted_moves()
+        return len(states)
+
+    return {
+        'game_state.make_undo_per_sec': measure(make_undo, duration),
+        'game_state.sorted_moves_cold_us': 1e6 / measure(sorted_moves_cold, duration),
+        'game_state.sorted_moves_cached_us': 1e6 / measure(sorted_moves_cached, duration),
+    }
+
+
+def bench_alpha_beta(depth: int = ALPHA_BETA_DEPTH) -> dict:
+    """
+    Iterative Deepening bis depth je Stellung: Knoten, Knoten pro Sekunde und Zeit bis zu jeder Tiefe.
+    """
+    results = {}
+    engine = AlphaBetaEngine(threat_nodes=0)
+    for _, name, board, player in iter_positions():
+        engine.game_state = GameState(board, player)
+        engine.identity = player
+        engine.transposition_table.clear()
+        engine.move_ordering.clear()
+        engine.nodes, engine.alpha_cuts, engine.beta_cuts = 0, 0, 0
+
+        times = []
+        report = engine.report
+        engine.report = lambda d, score, move: (times.append(time.perf_counter() - start), report(d, score, move))
+        start = time.perf_counter()
+        with quiet():
+            engine.iterative_deepening(depth)
+        elapsed = time.perf_counter() - start
+        del engine.report
+
+        results[f'alpha_beta.{name}.nodes'] = engine.nodes
+        results[f'alpha_beta.{name}.nodes_per_sec'] = engine.nodes / elapsed
+        for d, t in enumerate(times, start=1):
+            results[f'alpha_beta.{name}.depth_{d}_ms'] = 1e3 * t
+    return results
+
+
+def bench_mcts(iterations: int = MCTS_ITERATIONS, batch_size: int = MCTS_BATCH_SIZE) -> dict:
+    """
+    Simulationen pro Sekunde der MCTS je Stellung, einzeln über simulate und gebündelt über rollout.py.
+    """
+    results = {}
+    for _, name, board, player in iter_positions():
+        for label, size in (('single', 1), ('batched', batch_size)):
+            random.seed(SEED)
+            engine = MonteCarloEngine([row[:] for row in board], player, batch_size=size, threat_nodes=0)
+            engine.rollout = BatchRollout(seed=SEED)
+            engine.identity = player
+            start = time.perf_counter()
+            with quiet():
+                engine.mcts(iterations)
+            results[f'mcts.{name}.{label}_simulations_per_sec'] = engine.simulations / (time.perf_counter() - start)
+    return results
+
+
+BENCHMARKS = {
+    'evaluator': bench_evaluator,
+    'game_state': bench_game_state,
+    'alpha_beta': bench_alpha_beta,
+    'mcts': bench_mcts,
+}
+
+
+def run(names=None, quick: bool = False) -> dict:
+    """
+    Führt die Benchmarks names (alle bei None) aus und gibt das Ergebnis als JSON-fähiges Dict zurück.
+    quick verkürzt Messdauer und Suchen für einen schnellen Überblick.
+    """
+    options = {
+        'evaluator': {'duration': DURATION / 5} if quick else {},
+        'game_state': {'duration': DURATION / 5} if quick else {},
+        'alpha_beta': {'depth': ALPHA_BETA_DEPTH - 1} if quick else {},
+        'mcts': {'iterations': MCTS_ITERATIONS // 3} if quick else {},
+    }
+    check_positions()
+    metrics = {}
+    for name in names or BENCHMARKS:
+        metrics.update(BENCHMARKS[name](**options[name]))
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'quick': quick,
+            'seed': SEED,
+        },
+        'metrics': metrics,
+    }
+
+
+def higher_is_better(metric: str) -> bool:
+    return metric.endswith('_per_sec')
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Vergleicht die Metriken mit einer Baseline. Gibt (Metrik, Baseline, Wert, relative Änderung, Regression)
+    für alle gemeinsamen Metriken zurück. Eine Regression ist eine Verschlechterung um mehr als tolerance.
+    """
+    rows = []
+    for metric, value in results['metrics'].items():
+        base = baseline['metrics'].get(metric)
+        if base is None:
+            continue
+        change = value / base - 1 if base else 0.0
+        worse = -change if higher_is_better(metric) else change
+        rows.append((metric, base, value, change, worse > tolerance))
+    return rows
@@ -0,0 +1,127 @@
+"""
+In dieser Datei ist die Geometrie der Bitboards deklariert.
+
+Jedes Feld (row, col) entspricht dem Bit idx = row * 15 + col. Zusätzlich wird jede der vier
+Linienrichtungen als Liste von Linien-Masken geführt, in denen das Feld an Position pos liegt:
+
+    HORIZONTAL:    Linie row,            pos = col
+    VERTICAL:      Linie col,            pos = row
+    ANTI_DIAGONAL: Linie row + col,      pos = col   (Richtung (-1, 1) / (1, -1))
+    DIAGONAL:      Linie row - col + 14, pos = col   (Richtung (-1, -1) / (1, 1))
+
+Die Reihenfolge der Richtungen entspricht der von Evaluator.get_lines_in_each_direction.
+"""
+
+SIZE = 15
+CELLS = SIZE * SIZE
+FULL = (1 << CELLS) - 1
+
+HORIZONTAL, VERTICAL, ANTI_DIAGONAL, DIAGONAL = range(4)
+DIRECTIONS = (HORIZONTAL, VERTICAL, ANTI_DIAGONAL, DIAGONAL)
+
+# Anzahl Linien je Richtung
+LINE_COUNTS = (SIZE, SIZE, 2 * SIZE - 1, 2 * SIZE - 1)
+
+
+def _cell_lines(row: int, col: int) -> tuple:
+    return ((row, col), (col, row), (row + col, col), (row - col + SIZE - 1, col))
+
+
+# CELL_LINES[idx][direction] = (line, pos)
+CELL_LINES = tuple(_cell_lines(idx // SIZE, idx % SIZE) for idx in range(CELLS))
+
+# LINE_MASKS[direction][line] = Bitmaske der Positionen, die auf dem Brett liegen
+LINE_MASKS = tuple([0] * count for count in LINE_COUNTS)
+for _idx in range(CELLS):
+    for _d, (_line, _pos) in enumerate(CELL_LINES[_idx]):
+        LINE_MASKS[_d][_line] |= 1 << _pos
+
+# LINE_CELLS[direction][line][pos] = idx bzw. -1, falls die Position nicht auf dem Brett liegt
+LINE_CELLS = tuple([[-1] * SIZE for _ in range(count)] for count in LINE_COUNTS)
+for _idx in range(CELLS):
+    for _d, (_line, _pos) in enumerate(CELL_LINES[_idx]):
+        LINE_CELLS[_d][_line][_pos] = _idx
+
+
+def _neighbourhood(row: int, col: int) -> int:
+    mask = 0
+    for d_x, d_y in [(0, 1), (1, 0), (1, 1), (-1, -1), (-1, 1), (1, -1), (-1, 0), (0, -1)]:
+        for i in range(1, 3):
+            new_row = row + i * d_y
+            new_col = col + i * d_x
+            if 0 <= new_row < SIZE and 0 <= new_col < SIZE:
+                mask |= 1 << (new_row * SIZE + new_col)
+    return mask
+
+
+# NEIGHBOURHOOD[idx] = alle Felder im Abstand 1 und 2 in den acht Richtungen um idx
+NEIGHBOURHOOD = tuple(_neighbourhood(idx // SIZE, idx % SIZE) for idx in range(CELLS))
+
+
+def iter_bits(mask: int):
+    """
+    Liefert die Indizes aller gesetzten Bits von mask in aufsteigender Reihenfolge.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _line_neighbourhood(row: int, col: int) -> int:
+    mask = 0
+    for d_x, d_y in [(0, 1), (1, 0), (1, 1), (-1, -1), (-1, 1), (1, -1), (-1, 0), (0, -1)]:
+        for i in range(0, 6):
+            new_row = row + i * d_y
+            new_col = col + i * d_x
+            if 0 <= new_row < SIZE and 0 <= new_col < SIZE:
+                mask |= 1 << (new_row * SIZE + new_col)
+    return mask
+
+
+# LINE_NEIGHBOURHOOD[idx] = alle Felder auf den vier Linien durch idx im Abstand höchstens 5 (inklusive idx).
+# Nur deren Bewertung kann sich durch einen Zug auf idx ändern.
+LINE_NEIGHBOURHOOD = tuple(_line_neighbourhood(idx // SIZE, idx % SIZE) for idx in range(CELLS))
+
+# PADDED_BORDERS[direction][line] = Randfelder der um 5 Positionen nach links verschobenen Linie, inklusive
+# je 5 Positionen Rand auf beiden Seiten. Damit lassen sich die 5 Nachbarn jeder Position ohne
+# negative Shifts aus der Linie schneiden.
+PADDED_BORDERS = tuple([(((~mask) & ((1 << SIZE) - 1)) << 5) | 31 | (31 << (SIZE + 5)) for mask in masks]
+                       for masks in LINE_MASKS)
+
+
+def _window_neighbours(idx: int) -> tuple:
+    neighbours = []
+    for direction, (line, pos) in enumerate(CELL_LINES[idx]):
+        cells = []
+        for k in range(pos - 5, pos + 6):
+            if k != pos and 0 <= k < SIZE and LINE_CELLS[direction][line][k] >= 0:
+                cells.append((LINE_CELLS[direction][line][k], k))
+        neighbours.append(tuple(cells))
+    return tuple(neighbours)
+
+
+# WINDOW_NEIGHBOURS[idx][direction] = ((cell, pos), ...) aller Felder, deren Fenster in dieser Richtung idx enthält
+WINDOW_NEIGHBOURS = tuple(_window_neighbours(idx) for idx in range(CELLS))
+
+# WINDOW_SLOTS[idx] = die Slots 4 * cell + direction aus WINDOW_NEIGHBOURS[idx] in derselben Reihenfolge
+WINDOW_SLOTS = tuple(tuple(4 * cell + direction for direction in DIRECTIONS for cell, _ in WINDOW_NEIGHBOURS[idx][direction])
+                     for idx in range(CELLS))
+
+
+def _symmetry(idx: int, transform: int) -> int:
+    row, col = divmod(idx, SIZE)
+    if transform & 4:
+        col = SIZE - 1 - col
+    for _ in range(transform & 3):
+        row, col = col, SIZE - 1 - row
+    return row * SIZE + col
+
+
+# SYMMETRIES[transform][idx] = Bild von idx unter einer der 8 Symmetrien des Brettes
+# (Bit 2: Spiegelung an der Mittelsenkrechten, Bits 0-1: Anzahl Drehungen um 90 Grad danach)
+SYMMETRIES = tuple(tuple(_symmetry(idx, transform) for idx in range(CELLS)) for transform in range(8))
+# INVERSE_SYMMETRIES[transform] = Symmetrie, die transform rückgängig macht
+INVERSE_SYMMETRIES = tuple(next(inverse for inverse in range(8)
+                                if all(SYMMETRIES[inverse][SYMMETRIES[transform][idx]] == idx for idx in range(CELLS)))
+                           for transform in range(8))
@@ -0,0 +1,81 @@
+import sys
+from collections import OrderedDict
+
+"""
+In dieser Datei ist ein begrenzter Cache mit LRU-Verdrängung implementiert.
+
+Der Cache ist durch eine maximale Anzahl Einträge und/oder eine maximale Größe in Bytes beschränkt.
+Die Größe eines Eintrags wird über size_of geschätzt, für kompakte Werte (array, bytes, Tupel davon)
+ist das genau genug.
+"""
+
+DEFAULT_MAX_ENTRIES = 100_000
+DEFAULT_MAX_BYTES = 32 * 2**20
+
+
+def size_of(value) -> int:
+    """
+    Schätzt den Speicherbedarf eines Wertes. Tupel und Listen werden eine Ebene tief gezählt.
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, (tuple, list)):
+        size += sum(sys.getsizeof(item) for item in value)
+    return size
+
+
+class BoundedCache:
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # Reihenfolge der Einträge = Reihenfolge der letzten Verwendung, der älteste Eintrag steht vorne
+        self.entries = OrderedDict()
+        self.bytes = 0
+
+        # Statistiken
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key) -> bool:
+        return key in self.entries
+
+    def get(self, key, default=None):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, value) -> None:
+        size = size_of(value)
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.bytes -= old[1]
+        self.entries[key] = (value, size)
+        self.bytes += size
+
+        while self.entries and (len(self.entries) > self.max_entries or self.bytes > self.max_bytes):
+            _, (_, evicted_size) = self.entries.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.bytes = 0
+
+    def get_statistics(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'bytes': self.bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
@@ -1,4 +1,6 @@
 from constants import Piece, Threats
+from bitboard import CELL_LINES, PADDED_BORDERS
+from pattern_table import PAIR_MERGE, PAIR_VALUES, PAIRS, SIDE_DIGITS, SIDE_DIGITS_REVERSED, SIDE_WINDOWS, get_table
 
 class Evaluator:
     """
@@ -8,51 +10,33 @@ class Evaluator:
     # Das ist der Threshold-Wert, ab dem eine Stellung gewonnen ist.
     WIN = 1e14
 
-    def __init__(self) -> None:
-        self.pattern_hash = {}
-
-    def get_lines_in_each_direction(self, board: list[list[Piece]], row: int, col: int, player: Piece):
-
-        def walk(dir_x: int, dir_y: int):
-            seq = []
-            empty = 0
-
+    def __init__(self, table=None) -> None:
+        # Prozessweite Lookup-Tabelle aller Linienfenster (siehe pattern_table.py)
+        self.table = get_table() if table is None else table
+
+    def get_window_index(self, board: list[list[Piece]], row: int, col: int, dir_x: int, dir_y: int, player: Piece) -> int:
+        """
+        Berechnet den Fenster-Index für das Feld (row, col) in Richtung (dir_x, dir_y) direkt aus dem Brett.
+        Die negative Richtung ist die linke Seite des Fensters.
+        """
+        def side(step_x: int, step_y: int):
+            value = 0
+            weight = 1
             for i in range(1, 6):
-                cur_row = row + dir_y * i
-                cur_col = col + dir_x * i
+                cur_row = row + step_y * i
+                cur_col = col + step_x * i
 
-                if not (cur_col >= 0 and cur_col < 15 and cur_row >= 0 and cur_row < 15):
-                    seq.append(player * (-1))
-                    break
-                
-                piece = board[cur_row][cur_col]
-                if piece == 0:
-                    seq.append(0)
-                    if empty > 0:
-                        break
-                    empty += 1
+                if not (0 <= cur_col < 15 and 0 <= cur_row < 15):
+                    digit = 2
                 else:
-                    seq.append(piece)
-                    if piece == player * (-1):
-                        break
-                        
-            return seq
-        
-        def get_line(neg_dir_x, neg_dir_y, pos_dir_x, pos_dir_y):
-            seq = walk(neg_dir_x, neg_dir_y)
-            seq.reverse()
-            seq.append(player)
-            seq += walk(pos_dir_x, pos_dir_y)
-
-            return tuple(seq)
+                    piece = board[cur_row][cur_col]
+                    digit = 0 if piece == 0 else 1 if piece == player else 2
+                value += digit * weight
+                weight *= 3
+            return value
 
-        h_seq = get_line(-1, 0, 1, 0)
-        v_seq = get_line(0, -1, 0, 1)
-        d1_seq = get_line(-1, 1, 1, -1)
-        d2_seq = get_line(-1, -1, 1, 1)
+        return side(-dir_x, -dir_y) * SIDE_WINDOWS + side(dir_x, dir_y)
 
-        return (h_seq, v_seq, d1_seq, d2_seq)
-    
     def find_patterns(self, seq: list[Piece], a: int, b: int, player: Piece) -> list:
         gap = 0
         same = 0
@@ -199,22 +183,38 @@ class Evaluator:
         
         return Threats.NONE
     
-    def evaluate(self, board: list[list[Piece]], row, col, player: int):
-        sequences = self.get_lines_in_each_direction(board, row, col, player)
-        threats = []
-        for seq in sequences:
-            if seq in self.pattern_hash:
-                threats += self.pattern_hash[seq]
-            else:
-                t = self.get_threats_in_line(seq, player)
-                self.pattern_hash[seq] = t
-                threats += t
+    def combine(self, pairs) -> float:
+        """
+        Summiert die beiden stärksten Bedrohungen über die Paar-Codes der vier Richtungen.
+        """
+        first = PAIR_MERGE[pairs[0] * PAIRS + pairs[1]]
+        second = PAIR_MERGE[pairs[2] * PAIRS + pairs[3]]
+        return PAIR_VALUES[PAIR_MERGE[first * PAIRS + second]]
 
-        threats.sort(key=lambda x: x.value, reverse=True)
-        
-        if len(threats) == 0:
-            return 0
-        elif len(threats) == 1:
-            return threats[0].value
-        else:
-            return threats[0].value + threats[1].value
\ No newline at end of file
+    def evaluate(self, board: list[list[Piece]], row, col, player: int):
+        return self.combine([self.table[self.get_window_index(board, row, col, dir_x, dir_y, player)]
+                             for dir_x, dir_y in ((1, 0), (0, 1), (1, -1), (1, 1))])
+
+    def evaluate_lines(self, lines: dict, row, col, player: int):
+        """
+        Wie evaluate, liest die Nachbarfelder aber aus den Linien-Sichten von GameState.lines.
+        Pro Richtung ist das eine Index-Berechnung mit Masken und ein Zugriff auf die Tabelle.
+        """
+        own_lines = lines[player]
+        opponent_lines = lines[-player]
+        pairs = []
+        for direction, (line, pos) in enumerate(CELL_LINES[row * 15 + col]):
+            own = own_lines[direction][line] << 5
+            blocked = (opponent_lines[direction][line] << 5) | PADDED_BORDERS[direction][line]
+            pairs.append(self.table[window_index(own, blocked, pos)])
+        return self.combine(pairs)
+
+
+def window_index(own: int, blocked: int, pos: int) -> int:
+    """
+    Fenster-Index der Position pos einer Linie. own und blocked sind die um 5 verschobenen
+    Linien-Masken inklusive Rand (siehe bitboard.PADDED_BORDERS).
+    """
+    left = SIDE_DIGITS_REVERSED[((own >> pos) & 31) | ((blocked >> pos) & 31) << 5]
+    right = SIDE_DIGITS[((own >> (pos + 6)) & 31) | ((blocked >> (pos + 6)) & 31) << 5]
+    return left * SIDE_WINDOWS + right
@@ -1,29 +1,57 @@
+import numpy as np
+from array import array
+from heapq import heapify, heappop
+from cache import BoundedCache
 from constants import Piece
-from evaluator import Evaluator
-from zobrist import Zobrist
-from copy import deepcopy
+from evaluator import Evaluator, window_index
+from threat_scanner import cell_values, heuristic_values, threat_pairs
+from zobrist import Zobrist, canonical_key
+from bitboard import (CELL_LINES, CELLS, INVERSE_SYMMETRIES, LINE_COUNTS, LINE_NEIGHBOURHOOD, NEIGHBOURHOOD,
+                      PADDED_BORDERS, SYMMETRIES, WINDOW_NEIGHBOURS, WINDOW_SLOTS, iter_bits)
+
+BLACK = Piece.BLACK.value
+WHITE = Piece.WHITE.value
+
 
 class GameState:
 
-    def __init__(self, board: list[list[int]] = None, player=Piece.BLACK.value) -> None:
+    def __init__(self, board: list[list[int]] = None, player=Piece.BLACK.value, cache: BoundedCache = None) -> None:
         self.evaluator = Evaluator()
         self.zobrist = Zobrist()
 
-        self.active_map: list[list[bool]] = [[False for _ in range(15)] for _ in range(15)]
+        # Bitboards: Steine je Spieler und die aktiven Felder (Kandidaten für den nächsten Zug)
+        self.stones = {BLACK: 0, WHITE: 0}
+        self.active = 0
+        # Linien-Sichten der Steine je Spieler: self.lines[player][direction][line] (siehe bitboard.py)
+        self.lines = {p: [[0] * count for count in LINE_COUNTS] for p in self.stones}
 
         # Spieler, der aktuell am Zug ist
         self.player = player
-        # Speichert den bisherigen Spielverlauf als Stack. Jedes Element ist vom Typ (row, col, active_map_changes, player, zobrist_hash)
+        # Speichert den bisherigen Spielverlauf als Stack. Jedes Element ist vom Typ
+        # (row, col, previous_active, player, symmetric_hashes, heuristic_delta, old_threat_pairs, score_changes)
         self.move_history = []
-        # Zobrist-Hash Wert des aktuellen Spielzustandes
+        # Zobrist-Hash Wert des aktuellen Spielzustandes (inklusive Spieler am Zug, siehe zobrist.py)
         self.zobrist_hash = 0
+        # Zobrist-Hashes der 8 symmetrischen Bilder der Stellung, Eintrag 0 ist zobrist_hash (siehe canonical_key)
+        self.symmetric_hashes = (0,) * 8
+
+        # Paar-Codes der beiden stärksten Bedrohungen (siehe pattern_table.py) je Spieler und Feld in jeder Richtung,
+        # flach über idx * 4 + direction. Für besetzte Felder wird nur der Eintrag des Besitzers aktuell gehalten.
+        self.threat_pairs = {p: [0] * (4 * CELLS) for p in self.stones}
+        # Vorzeichenbehafteter Beitrag jedes besetzten Feldes und deren Summe (Heuristik aus Sicht von Schwarz)
+        self.cell_scores = [0] * CELLS
+        self.heuristic_value = 0
+        # Threat-Potenzial jedes freien Feldes als Zug (Bewertung für Schwarz + Bewertung für Weiß).
+        # Felder in self.stale sind seit ihrer letzten Bewertung durch einen Zug oder eine Zugrücknahme
+        # auf ihren Linien verändert worden und werden erst bei Bedarf neu bewertet.
+        self.move_scores = [0] * CELLS
+        self.stale = 0
 
-        # Hashmaps um bereits berechnete Werte wiederzuverwenden um neuen Wert nach einem Zug zu berechnen.
-        self.heurstic_values = {}
-        self.sorted_moves = {}
-        self.score_maps = {}
+        # Begrenzter Cache (LRU) der sortierten Züge je kanonischem Hash. Die Züge werden kompakt als
+        # (array('B') der Feld-Indizes in kanonischer Orientierung, array('d') der Bewertungen) gespeichert.
+        self.sorted_moves = BoundedCache() if cache is None else cache
 
-        # Wenn GameState von einem bestehenden Spielzustand erzeugt wird, initialisiere die active_map und den Zobrist-Hash entsprechend
+        # Wenn GameState von einem bestehenden Spielzustand erzeugt wird, initialisiere die Bitboards und den Zobrist-Hash entsprechend
         if board is None:
             self.board: list[list[int]] = [[0 for col in range(15)] for row in range(15)]
         else:
@@ -31,78 +59,147 @@ class GameState:
             for row in range(15):
                 for col in range(15):
                     if self.board[row][col] != 0:
-                        self.update_active_map(row, col)
-                        self.zobrist.update_hash(self.zobrist_hash, row, col, self.board[row][col])
-        
-    
-    def make_move(self, row, col):
+                        self.place_stone(row, col, self.board[row][col])
+            for idx in iter_bits(self.occupied()):
+                self.active |= NEIGHBOURHOOD[idx]
+            self.active &= ~self.occupied()
+        self.symmetric_hashes = self.zobrist.hash_board_symmetric(self.board, player)
+        self.zobrist_hash = self.symmetric_hashes[0]
+
+        # Startwerte der inkrementellen Bewertung mit dem vektorisierten Scanner (siehe threat_scanner.py)
+        board_array = np.array(self.board, dtype=np.int8)[None]
+        values = {}
+        for p in self.stones:
+            pairs = threat_pairs(board_array, p)
+            self.threat_pairs[p] = pairs.reshape(-1).tolist()
+            values[p] = cell_values(pairs)[0].tolist()
+        for idx in iter_bits(self.occupied()):
+            owner = BLACK if (self.stones[BLACK] >> idx) & 1 else WHITE
+            self.cell_scores[idx] = owner * values[owner][idx]
+            self.heuristic_value += self.cell_scores[idx]
+        for idx in range(CELLS):
+            if not (self.occupied() >> idx) & 1:
+                self.move_scores[idx] = values[BLACK][idx] + values[WHITE][idx]
+
+    def occupied(self) -> int:
         """
-        Aktualisiert GameState um den Zug (row, col)
+        Bitmaske aller besetzten Felder
         """
-        self.board[row][col] = self.player
-        changes = self.update_active_map(row, col)
-        self.move_history.append((row, col, changes, self.player, self.zobrist_hash))
-        self.zobrist_hash = self.zobrist.update_hash(self.zobrist_hash, row, col, self.player)
-        self.player = self.player * (-1)
+        return self.stones[BLACK] | self.stones[WHITE]
 
-    def undo_move(self):
+    def place_stone(self, row, col, player):
         """
-        Mache letzten Zug rückgängig
+        Setzt bzw. entfernt (XOR) den Stein von player auf (row, col) in den Bitboards und Linien-Sichten.
         """
-        row, col, changes, last_player, last_zobrist_hash = self.move_history.pop()
-        self.undo_active_map_changes(changes)
-        self.board[row][col] = 0
-        self.player = last_player
-        self.zobrist_hash = last_zobrist_hash
+        idx = row * 15 + col
+        self.stones[player] ^= 1 << idx
+        lines = self.lines[player]
+        for direction, (line, pos) in enumerate(CELL_LINES[idx]):
+            lines[direction][line] ^= 1 << pos
+
+    def evaluate_cell(self, idx, player):
+        """
+        Bewertet das Feld idx für player aus den gespeicherten Paar-Codes (wie Evaluator.evaluate).
+        """
+        return self.evaluator.combine(self.threat_pairs[player][4 * idx:4 * idx + 4])
 
-    def update_active_map(self, row, col):
+    def update_threat_pairs(self, idx) -> list:
+        """
+        Berechnet die Paar-Codes aller Felder neu, deren Fenster das Feld idx enthält, also höchstens
+        5 Felder entfernt auf den vier Linien durch idx. Gibt die alten Werte in der Reihenfolge von
+        WINDOW_SLOTS[idx] zurück (jeweils Schwarz, Weiß).
         """
-        Wenn neuer Zug ausgeführt wird, muss die active_map aktualisiert werden.
-        Das Feld auf dem der Zug gemacht wird ist danach natürlich nicht mehr "active".
-        Außerdem werden im Abstand 2 vom entsprechendem Feld, alle Felder, die bisher noch nicht "active"
-        waren nun active. Die gemachten Änderungen werden gespeichert um sie wieder rückgängig machen
-        zu können.
+        old = []
+        table = self.evaluator.table
+        black_stones = self.stones[BLACK]
+        white_stones = self.stones[WHITE]
+        black_pairs = self.threat_pairs[BLACK]
+        white_pairs = self.threat_pairs[WHITE]
+        for direction, (line, _) in enumerate(CELL_LINES[idx]):
+            black = self.lines[BLACK][direction][line] << 5
+            white = self.lines[WHITE][direction][line] << 5
+            border = PADDED_BORDERS[direction][line]
+            for cell, pos in WINDOW_NEIGHBOURS[idx][direction]:
+                slot = 4 * cell + direction
+                old.append(black_pairs[slot])
+                old.append(white_pairs[slot])
+                if not (white_stones >> cell) & 1:
+                    black_pairs[slot] = table[window_index(black, white | border, pos)]
+                if not (black_stones >> cell) & 1:
+                    white_pairs[slot] = table[window_index(white, black | border, pos)]
+        return old
+
+    def restore_threat_pairs(self, idx, old: list):
         """
-        dirs = [(0, 1), (1, 0), (1, 1), (-1, -1), (-1, 1), (1, -1), (-1, 0), (0, -1)]
-        changes = []
+        Macht update_threat_pairs rückgängig.
+        """
+        black_pairs = self.threat_pairs[BLACK]
+        white_pairs = self.threat_pairs[WHITE]
+        i = 0
+        for slot in WINDOW_SLOTS[idx]:
+            black_pairs[slot] = old[i]
+            white_pairs[slot] = old[i + 1]
+            i += 2
+
+    def make_move(self, row, col):
+        """
+        Aktualisiert GameState um den Zug (row, col)
+        Die aktiven Felder werden per Maske aktualisiert: das Feld des Zuges ist danach nicht mehr aktiv,
+        alle freien Felder im Abstand 2 sind es.
 
-        if self.active_map[row][col] == True:
-            self.active_map[row][col] = False
-            changes.append((row, col))
+        Die Heuristik wird inkrementell nachgeführt: nur die besetzten Felder auf den Linien durch den Zug
+        werden neu bewertet. Die Differenz und die alten Werte werden im move_history gespeichert.
+        Die freien Felder auf diesen Linien werden für iter_moves als veraltet markiert.
+        """
+        idx = row * 15 + col
+        self.board[row][col] = self.player
+        self.place_stone(row, col, self.player)
+        old_threat_pairs = self.update_threat_pairs(idx)
 
-        for d_x, d_y in dirs:
-            for i in range(1, 3):
-                new_row = row + i * d_y
-                new_col = col + i * d_x
+        delta = 0
+        score_changes = []
+        cell_scores = self.cell_scores
+        black_stones = self.stones[BLACK]
+        for cell in iter_bits(LINE_NEIGHBOURHOOD[idx] & self.occupied()):
+            owner = BLACK if (black_stones >> cell) & 1 else WHITE
+            score = owner * self.evaluate_cell(cell, owner)
+            score_changes.append((cell, cell_scores[cell]))
+            delta += score - cell_scores[cell]
+            cell_scores[cell] = score
+        self.heuristic_value += delta
+        self.stale |= LINE_NEIGHBOURHOOD[idx]
 
-                if 0 <= new_row < 15 and 0 <= new_col < 15 and self.board[new_row][new_col] == 0:
-                    if self.active_map[new_row][new_col] == False:
-                        changes.append((new_row, new_col))
-                        self.active_map[new_row][new_col] = True
+        self.move_history.append((row, col, self.active, self.player, self.symmetric_hashes, delta, old_threat_pairs, score_changes))
+        self.active = (self.active | NEIGHBOURHOOD[idx]) & ~self.occupied()
+        self.symmetric_hashes = self.zobrist.update_symmetric_hashes(self.symmetric_hashes, row, col, self.player)
+        self.zobrist_hash = self.symmetric_hashes[0]
+        self.player = self.player * (-1)
 
-        return changes
-        
-    def undo_active_map_changes(self, changes: list[tuple[int, int]]):
+    def undo_move(self):
         """
-        Macht die Änderungen an der active_map wieder rückgängig.
+        Mache letzten Zug rückgängig
         """
-        for row, col in changes:
-            self.active_map[row][col] = not self.active_map[row][col]
+        row, col, previous_active, last_player, last_hashes, delta, old_threat_pairs, score_changes = self.move_history.pop()
+        self.place_stone(row, col, last_player)
+        self.active = previous_active
+        self.board[row][col] = 0
+        self.player = last_player
+        self.symmetric_hashes = last_hashes
+        self.zobrist_hash = last_hashes[0]
+
+        self.heuristic_value -= delta
+        self.restore_threat_pairs(row * 15 + col, old_threat_pairs)
+        for cell, old in score_changes:
+            self.cell_scores[cell] = old
+        self.stale |= LINE_NEIGHBOURHOOD[row * 15 + col]
 
-    def invalidate(self, board, row, col):
+    def canonical_key(self) -> tuple[int, int]:
         """
-        Setzt die bereits berechneten Werte für diejenigen Felder zurückt, die durch den neuen Zug
-        eventuell verändert worden sind.
+        Gibt den kanonischen Hash der Stellung und die Symmetrie transform zurück, die die Stellung in die kanonische
+        Orientierung überführt. Felder werden mit SYMMETRIES[transform] in die kanonische Orientierung und mit
+        SYMMETRIES[INVERSE_SYMMETRIES[transform]] zurück abgebildet.
         """
-        dirs = [(0, 1), (1, 0), (1, 1), (-1, -1), (-1, 1), (1, -1), (-1, 0), (0, -1)]
-        for dir_x, dir_y in dirs:
-            cur_row, cur_col = row, col
-            k = 0
-            while k <= 5 and 0 <= cur_row < 15 and 0 <= cur_col < 15:
-                board[cur_row][cur_col] = None
-                cur_col += dir_x
-                cur_row += dir_y
-                k += 1
+        return canonical_key(self.symmetric_hashes)
 
     def get_heuristic_value(self):
         """
@@ -111,75 +208,63 @@ class GameState:
         Die Evaluierung geschieht immer aus Sicht des schwarzen Spielers, daher werden schwarze Bedrohungen positiv
         und weiße Bedrohungen negativ summiert.
 
-        Der Wert wird inkrementell berechnet. Falls die aktuelle Position nicht im Cache gespeichert ist,
-        versuche die letzte Position aus dem Cache zu bekommen und berechne darauf basierend inkrementell
-        den neuen Wert nach dem letzten Zug.
+        Der Wert wird in make_move und undo_move inkrementell nachgeführt.
         """
-        if self.zobrist_hash in self.heurstic_values:
-            score = self.heurstic_values[self.zobrist_hash]
-        else:
-            prev_scores = None
-            if len(self.move_history) > 0:
-                last_row, last_col, _, old_player, last_hash = self.move_history[-1]
-                if last_hash in self.score_maps:
-                    prev_scores = deepcopy(self.score_maps[last_hash])
-                    self.invalidate(prev_scores, last_row, last_col)
-            
-            score_map = [[0 for _ in range(15)] for _ in range(15)]
-            eval_value = 0
-            for row in range(15):
-                for col in range(15):
-                    if self.board[row][col] == 0:
-                        continue
-                    if prev_scores is not None and prev_scores[row][col] is not None:
-                        score_map[row][col] = prev_scores[row][col]
-                    else:
-                        score = self.evaluator.evaluate(self.board, row, col, self.board[row][col])
-                        score *= 1 if self.board[row][col] == Piece.BLACK.value else -1
-                        score_map[row][col] = score
-                        eval_value += score
-                
-            self.score_maps[self.zobrist_hash] = score_map
-        return eval_value
-
-    
-    def get_sorted_moves(self) -> list:
+        return self.heuristic_value
+
+    def verify(self) -> bool:
         """
-        Gibt die Nachfolgerzüge der aktuellen Spielstellung austeigend geordnet nach ihrem
-        "Threat-Potenzial" zurück. Dabei werden nun aktive (bezüglich der active_map) Züge berücksichtigt.
-        """
-        if self.zobrist_hash in self.sorted_moves:
-            return self.sorted_moves[self.zobrist_hash]
-        
-        sorted_moves = []
-        score_map = [[None for _ in range(15)] for _ in range(15)]
-        if len(self.move_history) > 0:
-            last_row, last_col, _, old_player, last_hash = self.move_history[-1]
-
-            if last_hash in self.sorted_moves: 
-                for row, col, score in self.sorted_moves[last_hash]:
-                    score_map[row][col] = score
-                self.invalidate(score_map, last_row, last_col)
-
-        no_active_squares = True
-        for row in range(15):
-            for col in range(15):
-                if self.active_map[row][col]:
-                    no_active_squares = False
-                    if score_map[row][col] is not None:
-                        sorted_moves.append((row, col, score_map[row][col]))
-                    else:
-                        black_score = self.evaluator.evaluate(self.board, row, col, Piece.BLACK.value)
-                        white_score = self.evaluator.evaluate(self.board, row, col, Piece.WHITE.value)
-
-                        sorted_moves.append((row, col, black_score + white_score))
-        
-        if no_active_squares:
-            sorted_moves.append((7, 7, 0))
-
-        sorted_moves.sort(key=lambda x: x[2], reverse=True)
-        self.sorted_moves[self.zobrist_hash] = sorted_moves
-        return sorted_moves
+        Vergleicht die inkrementell nachgeführte Bewertung mit einer vollständigen Neuberechnung durch den Scanner
+        (Paar-Codes aller relevanten Felder und Heuristik). Zur Kontrolle bei Änderungen an der Bewertung.
+        """
+        board_array = np.array(self.board, dtype=np.int8)[None]
+        for p in self.stones:
+            pairs = threat_pairs(board_array, p).reshape(-1).tolist()
+            opponent = self.stones[-p]
+            for idx in range(CELLS):
+                if not (opponent >> idx) & 1 and pairs[4 * idx:4 * idx + 4] != self.threat_pairs[p][4 * idx:4 * idx + 4]:
+                    return False
+        expected = heuristic_values(board_array)[0]
+        return abs(expected - self.heuristic_value) <= 1e-9 * max(1.0, abs(expected))
+
+    def iter_moves(self):
+        """
+        Liefert die Nachfolgerzüge (row, col, score) absteigend nach ihrem "Threat-Potenzial" als Generator.
+        Neu bewertet werden nur die aktiven Felder, die seit ihrer letzten Bewertung auf den Linien eines
+        Zuges lagen. Danach wird nur ein Heap der aktiven Felder aufgebaut, aus dem erst bei Bedarf der
+        jeweils nächste Zug entnommen wird. Bricht die Suche nach wenigen Zügen ab, werden die übrigen
+        nie sortiert.
+        """
+        if self.active == 0:
+            yield 7, 7, 0
+            return
 
+        move_scores = self.move_scores
+        stale = self.stale & self.active
+        for idx in iter_bits(stale):
+            move_scores[idx] = self.evaluate_cell(idx, BLACK) + self.evaluate_cell(idx, WHITE)
+        self.stale ^= stale
 
+        heap = [(-move_scores[idx], idx) for idx in iter_bits(self.active)]
+        heapify(heap)
+        while heap:
+            score, idx = heappop(heap)
+            yield idx // 15, idx % 15, -score
 
+    def get_sorted_moves(self) -> list:
+        """
+        Gibt die Nachfolgerzüge der aktuellen Spielstellung absteigend geordnet nach ihrem
+        "Threat-Potenzial" zurück. Dabei werden nur aktive (bezüglich self.active) Züge berücksichtigt.
+        """
+        key, transform = self.canonical_key()
+        cached = self.sorted_moves.get(key)
+        if cached is not None:
+            indices, scores = cached
+            inverse = SYMMETRIES[INVERSE_SYMMETRIES[transform]]
+            return [(inverse[idx] // 15, inverse[idx] % 15, score) for idx, score in zip(indices, scores)]
+
+        sorted_moves = list(self.iter_moves())
+        mapping = SYMMETRIES[transform]
+        self.sorted_moves.put(key, (array('B', [mapping[row * 15 + col] for row, col, _ in sorted_moves]),
+                                    array('d', [score for _, _, score in sorted_moves])))
+        return sorted_moves
@@ -1,6 +1,7 @@
 import tkinter as tk
 from alpha_beta_engine import AlphaBetaEngine
 from mcts import MonteCarloEngine
+from rules import winning_line
 import numpy as np
 
 class GomokuGame:
@@ -115,28 +116,11 @@ class GomokuGame:
                 self.hover_item = None
 
     def check_winner(self, row, col):
-        def check_line(start, direction):
-            count = 0
-            line = []
-            for step in range(-4, 5):
-                r = start[0] + step * direction[0]
-                c = start[1] + step * direction[1]
-                if 0 <= r < self.board_size and 0 <= c < self.board_size and self.board[r, c] == self.current_player:
-                    count += 1
-                    line.append((r, c))
-                    if count == 5:
-                        self.winning_line = line
-                        return True
-                else:
-                    count = 0
-                    line = []
+        line = winning_line(self.board, row, col, self.current_player, self.board_size)
+        if line is None:
             return False
-
-        directions = [(1, 0), (0, 1), (1, 1), (1, -1)]
-        for direction in directions:
-            if check_line((row, col), direction):
-                return True
-        return False
+        self.winning_line = line
+        return True
 
     def reset_game(self):
         self.board = np.zeros((self.board_size, self.board_size), dtype=int)
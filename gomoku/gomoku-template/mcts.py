@@ -1,28 +1,54 @@
-import math
 import random
+import numpy as np
 
 from game_state import GameState
 from evaluator import Evaluator
 from constants import Piece
+from mcts_tree import MonteCarloTree, ROOT
+from rollout import BatchRollout
+from parallel import SharedStopFlag
+from opening_book import get_book
+from time_control import MoveTimer
+from threat_search import find_forced_win, DEFAULT_MAX_NODES, DEFAULT_TIME_LIMIT
+import multiprocessing
+import queue
+import sys
 import threading
+import time
 
-
-class MonteCarloNode:
-
-    def __init__(self, move=None, parent=None):
-        self.move = move
-        self.reward = 0
-        self.visits = 0
-        self.parent = parent
-        self.visited_children = set()
-        self.children = []
+# Abstand in Sekunden, in dem die Worker der Root-Parallelisierung ihre Statistiken melden
+REPORT_INTERVAL = 0.1
+# Simulationen je Zug ohne Zeitkontrolle
+DEFAULT_ITERATIONS = 1000
 
 
 class MonteCarloEngine:
 
-    def __init__(self, board=None, player=Piece.BLACK.value) -> None:
+    def __init__(self, board=None, player=Piece.BLACK.value, workers=1, batch_size=1,
+                 threat_nodes=DEFAULT_MAX_NODES, threat_time=DEFAULT_TIME_LIMIT, book=None, stats=None,
+                 time_control=None) -> None:
         self.game_state = GameState(board, player)
-        self.root_node = None
+        # Suchbaum als Spalten-Speicher (siehe mcts_tree.py), Knoten sind Ids
+        self.tree = MonteCarloTree()
+        self.root_node = ROOT
+        # Stellung und Spieler am Zug an der Wurzel des Baumes, um ihn im nächsten Zug weiterzuverwenden
+        self.root_position = None
+        self.root_player = None
+        # Anzahl Prozesse für die Root-Parallelisierung, bei 1 wird im Evaluations-Thread gesucht
+        self.workers = workers
+        # Anzahl Blätter, die je Runde gemeinsam simuliert werden (siehe rollout.py), bei 1 über simulate
+        self.batch_size = batch_size
+        self.rollout = BatchRollout()
+        # Budget der Threat-Space Suche an der Wurzel (0 = aus)
+        self.threat_nodes = threat_nodes
+        self.threat_time = threat_time
+        # Eröffnungsbuch (siehe opening_book.py), standardmäßig das prozessweite Buch
+        self.book = get_book() if book is None else book
+        # Optionale Instrumentierung der Suche (siehe search_stats.py), bei None ohne Kosten
+        self.stats = stats
+        # Optionale Bedenkzeit (siehe time_control.py)
+        self.time_control = time_control
+        self.move_timer = None
 
         self.identity = player
         self.current_result = (-1, -1)
@@ -30,20 +56,66 @@ class MonteCarloEngine:
         self.evaluation_thread = None
 
         # Statisticss
+        self.last_report = 0.0
         self.simulations = 0
+        self.reused_visits = 0
+        self.simulations_per_second = 0
+        self.worker_simulations_per_second = []
 
-    def start_evaluation(self, position, player, iterations=1000):
+    def start_evaluation(self, position, player, iterations=None, time_control=None):
         """
         Startet die Evaluation aus der GUI
+        Ohne Angabe werden DEFAULT_ITERATIONS Simulationen gespielt, mit Zeitkontrolle so viele, wie die Zeit erlaubt.
+        Eine übergebene Zeitkontrolle gilt ab diesem Zug.
+        """
+        if time_control is not None:
+            self.time_control = time_control
+        if self.prepare(position, player):
+            return
+
+        self.evaluation_thread = threading.Thread(target=self.search, args=[iterations])
+        self.evaluation_thread.start()
+
+    def analyse(self, position, player, iterations=None, time_control=None) -> dict:
+        """
+        Bewertet die Stellung synchron im aufrufenden Thread, z.B. für Batch-Analysen.
+        Die Zeitkontrolle gilt nur für diesen Aufruf. score ist der mittlere Reward des gewählten Zuges, wie ihn
+        die UCB-Auswahl verwendet, ohne Suche (Buch, Threat-Space Suche) None.
+        """
+        previous = self.time_control
+        self.time_control = time_control
+        try:
+            if not self.prepare(position, player):
+                self.search(iterations)
+        finally:
+            self.time_control = previous
+        score, visits = None, 0
+        if self.simulations > 0 and self.tree.expanded[self.root_node] > 0:
+            child = self.tree.most_visited_child(self.root_node)
+            visits = int(self.tree.visits[child])
+            score = float(self.tree.reward[child]) / visits if visits else None
+        return {'move': self.current_result, 'score': score, 'visits': visits, 'simulations': self.simulations}
 
+    def prepare(self, position, player) -> bool:
+        """
+        Setzt die Engine auf die Stellung. Gibt True zurück, wenn sie aus dem Eröffnungsbuch beantwortet wurde.
         """
         self.stop_event.clear()
 
         self.game_state = GameState(position, player)
         self.identity = player
+        self.simulations = 0
 
-        self.evaluation_thread = threading.Thread(target=self.mcts, args=[iterations])
-        self.evaluation_thread.start()
+        # Buchstellungen werden ohne Suche beantwortet
+        book_move = self.book.lookup(position, player)
+        if book_move is not None:
+            self.current_result = book_move
+            print(f'book move: {book_move}')
+            return True
+
+        if self.workers <= 1:
+            self.reuse_subtree(position, player)
+        return False
 
     def stop_evaluation(self):
         """
@@ -62,6 +134,86 @@ class MonteCarloEngine:
         """
         return self.current_result
 
+    def search(self, iterations=None):
+        """
+        Sucht zuerst per Threat-Space Suche nach einem erzwungenen Gewinn, sonst mit MCTS.
+        """
+        if self.stats is not None:
+            self.stats.attach_mcts(self)
+        if self.time_control is not None:
+            self.move_timer = MoveTimer(self.time_control, bin(self.game_state.occupied()).count('1'), self.stop_event)
+        if iterations is None:
+            iterations = DEFAULT_ITERATIONS if self.move_timer is None else sys.maxsize
+        try:
+            if self.threat_nodes:
+                threat_time = self.threat_time if self.move_timer is None else self.move_timer.threat_time(self.threat_time)
+                line = find_forced_win(self.game_state, self.identity, self.threat_nodes, threat_time, self.stop_event)
+                if line is not None:
+                    self.current_result = line[0]
+                    return
+            if self.move_timer is not None:
+                self.move_timer.begin()
+
+            if self.workers <= 1:
+                self.mcts(iterations)
+            else:
+                self.root_parallel(iterations)
+        finally:
+            if self.move_timer is not None:
+                self.move_timer.finish()
+                self.move_timer = None
+            if self.stats is not None:
+                self.stats.detach()
+                self.stats.emit('done')
+
+    def reuse_subtree(self, position, player) -> bool:
+        """
+        Ist position aus der Stellung an der Wurzel des bisherigen Baumes durch höchstens zwei Züge entstanden,
+        wird der Teilbaum unter diesen Zügen zur neuen Wurzel, sonst wird der Baum geleert.
+        Gibt zurück, ob ein Teilbaum übernommen wurde.
+        """
+        moves = self.moves_since_root(position, player)
+        node = ROOT
+        for move in moves or ():
+            node = self.tree.find_child(node, move)
+            if node < 0:
+                break
+
+        self.root_position = [row[:] for row in position]
+        self.root_player = player
+        self.root_node = ROOT
+        if moves is None or node < 0:
+            self.tree.reset()
+            self.reused_visits = 0
+            return False
+        if node != ROOT:
+            self.tree.extract(node)
+        self.reused_visits = int(self.tree.visits[ROOT])
+        print(f'reused subtree: {len(moves)} plies, visits: {self.reused_visits}, nodes: {self.tree.size}')
+        return True
+
+    def moves_since_root(self, position, player):
+        """
+        Gibt die Züge (Feld-Indizes) von der Stellung an der Wurzel zu position zurück,
+        oder None, wenn position keine Folgestellung mit höchstens zwei Zügen ist.
+        """
+        if self.root_position is None:
+            return None
+        added = {}
+        for row in range(15):
+            for col in range(15):
+                old, new = self.root_position[row][col], position[row][col]
+                if old != new:
+                    if old != 0:
+                        return None
+                    added[new] = row * 15 + col if new not in added else -1
+        plies = len(added)
+        # Die Züge wechseln sich ab: je ein Stein der beiden Spieler, beginnend mit dem Spieler an der Wurzel
+        if (plies > 2 or -1 in added.values() or player != self.root_player * (-1) ** plies
+                or (plies == 1 and self.root_player not in added)):
+            return None
+        return [added[self.root_player * (-1) ** i] for i in range(plies)]
+
     def is_terminal(self, score):
         return score >= Evaluator.WIN or score <= -Evaluator.WIN
 
@@ -70,9 +222,13 @@ class MonteCarloEngine:
         Nutzt Monte-Carlo Tree Search um besten Zug zu finden.
         Terminiert entweder wenn maximale Anzahl an Iterationen erreicht wurde oder
         wenn von GUI das Stoppsignal kommt.
+        Die Suche setzt den Baum unter self.root_node fort (siehe reuse_subtree).
 
         """
-        self.root_node = MonteCarloNode()
+        if self.batch_size > 1:
+            self.mcts_batched(iterations)
+            return
+
         k = 0
         simulation_depth = 10
         while not self.stop_event.is_set() and k < iterations:
@@ -81,27 +237,151 @@ class MonteCarloEngine:
             self.update(next_node, reward)
 
             # Nachfolgend sollte nichts verändert werden
-            move = self.most_visited_child(self.root_node)
-            self.current_result = move
-            print(f'simulations: {k}, move: {move}')
+            self.simulations = k + 1
+            self.report(k)
             k += 1
 
+    def mcts_batched(self, iterations=1000):
+        """
+        Wie mcts, aber je Runde werden bis zu self.batch_size Blätter ausgewählt und gemeinsam mit
+        self.rollout simuliert. Die Besuche werden schon bei der Auswahl gezählt, damit die weiteren
+        Auswahlen derselben Runde andere Blätter erreichen. Die Rewards werden nach den Simulationen
+        in einem Durchgang eingetragen. Blätter in Endstellungen erhalten wie in simulate den Reward 0.
+        """
+        tree = self.tree
+        k = 0
+        while not self.stop_event.is_set() and k < iterations:
+            batch = min(self.batch_size, iterations - k)
+            leaves, boards, players = [], [], []
+            for _ in range(batch):
+                node = self.tree_policy(self.root_node)
+                if not self.is_terminal(self.game_state.get_heuristic_value()):
+                    leaves.append(node)
+                    boards.append(np.array(self.game_state.board, dtype=np.int8))
+                    players.append(self.game_state.player)
+                for _ in range(tree.backpropagate(node, 0, self.root_node)):
+                    self.game_state.undo_move()
+
+            if leaves:
+                rewards = self.rollout.run(np.stack(boards), np.array(players, dtype=np.int8))
+                for node, reward in zip(leaves, rewards.tolist()):
+                    tree.add_reward(node, reward, self.root_node)
+
+            k += batch
+            self.simulations = k
+            self.report(k - 1)
+
+    def report(self, k):
+        """
+        Wird nach jeder Simulation aufgerufen. Ausgegeben wird höchstens alle REPORT_INTERVAL Sekunden.
+        """
+        move = self.most_visited_child(self.root_node)
+        self.current_result = move
+        if self.move_timer is not None and not self.move_timer.keep_simulating(self.simulations, *self.tree.top_visits(self.root_node)):
+            self.stop_event.set()
+        now = time.perf_counter()
+        if now - self.last_report >= REPORT_INTERVAL:
+            self.last_report = now
+            print(f'simulations: {k + 1}, move: {move}')
+
+    def root_parallel(self, iterations=1000):
+        """
+        Root-Parallelisierung: self.workers Prozesse bauen mit verschiedenen Seeds jeweils einen eigenen Baum
+        von der aktuellen Stellung aus auf und teilen sich die Iterationen. Die Worker melden regelmäßig
+        Besuche und Rewards der Kinder ihrer Wurzel. Diese werden je Zug summiert und in self.root_node
+        abgelegt, so dass most_visited_child und get_results die Statistik aller Bäume verwenden.
+        Das Stoppsignal der GUI wird an alle Prozesse weitergegeben.
+        """
+        context = multiprocessing.get_context('spawn')
+        stop = context.RawValue('b', 0)
+        results = context.Queue()
+        position = [row[:] for row in self.game_state.board]
+        seed = random.getrandbits(32)
+        share = -(-iterations // self.workers)
+        processes = [context.Process(target=root_parallel_worker, daemon=True,
+                                     args=(i, position, self.identity, share, seed + i, self.batch_size, stop, results))
+                     for i in range(self.workers)]
+
+        start = time.perf_counter()
+        # Letzte Meldung je Worker: {move: (visits, reward)}, Simulationen und Laufzeit
+        worker_children = [{} for _ in range(self.workers)]
+        worker_simulations = [0] * self.workers
+        worker_times = [0.0] * self.workers
+        done = 0
+        try:
+            for process in processes:
+                process.start()
+            while done < self.workers:
+                if self.stop_event.is_set():
+                    stop.value = 1
+                try:
+                    kind, worker_id, children, simulations, elapsed = results.get(timeout=0.05)
+                except queue.Empty:
+                    if not any(process.is_alive() for process in processes):
+                        break
+                    continue
+
+                worker_children[worker_id] = children
+                worker_simulations[worker_id] = simulations
+                worker_times[worker_id] = elapsed
+                if kind == 'done':
+                    done += 1
+                self.simulations = sum(worker_simulations)
+                if self.merge_root(worker_children):
+                    self.current_result = self.most_visited_child(self.root_node)
+                    if (self.move_timer is not None and
+                            not self.move_timer.keep_simulating(self.simulations, *self.tree.top_visits(self.root_node))):
+                        stop.value = 1
+        finally:
+            stop.value = 1
+            for process in processes:
+                process.join()
+
+        self.simulations_per_second = self.simulations / (time.perf_counter() - start)
+        self.worker_simulations_per_second = [n / t if t > 0 else 0 for n, t in zip(worker_simulations, worker_times)]
+        print(f'workers: {self.workers}, simulations: {self.simulations}, move: {self.current_result}, '
+              f'simulations/sec: {self.simulations_per_second:.0f}, '
+              f'per worker: {[round(n) for n in self.worker_simulations_per_second]}')
+
+    def merge_root(self, worker_children) -> bool:
+        """
+        Erzeugt self.root_node aus den summierten Statistiken der Wurzelkinder aller Worker.
+        Gibt False zurück, solange noch kein Worker ein Kind gemeldet hat.
+        """
+        merged = {}
+        for children in worker_children:
+            for move, (visits, reward) in children.items():
+                total_visits, total_reward = merged.get(move, (0, 0))
+                merged[move] = (total_visits + visits, total_reward + reward)
+        if not merged:
+            return False
+
+        tree = self.tree
+        tree.reset()
+        self.root_node = ROOT
+        tree.reserve_children(ROOT, [row * 15 + col for row, col in merged])
+        tree.expanded[ROOT] = len(merged)
+        for child, (visits, reward) in zip(tree.children(ROOT), merged.values()):
+            tree.visits[child] = visits
+            tree.reward[child] = reward
+            tree.visits[ROOT] += visits
+        return True
+
     def tree_policy(self, node):
         """
         Select next node to explore / exploit
+        Die Kinder eines Knotens werden beim ersten Expandieren für alle Nachfolgerzüge reserviert und
+        in umgekehrter Reihenfolge von get_sorted_moves expandiert.
         """
+        tree = self.tree
         while not self.is_terminal(self.game_state.get_heuristic_value()):
-            moves = [(col, row) for col, row, _ in self.game_state.get_sorted_moves()]
-            if len(moves) > len(node.visited_children):
-                move = moves.pop()
-                while move in node.visited_children:
-                    move = moves.pop()
-
+            if not tree.has_children(node):
+                moves = self.game_state.get_sorted_moves()
+                tree.reserve_children(node, [row * 15 + col for row, col, _ in reversed(moves)])
+            if not tree.is_fully_expanded(node):
                 # expand
-                node.visited_children.add(move)
-                self.game_state.make_move(*move)
-                new_node = MonteCarloNode(move=move, parent=node)
-                node.children.append(new_node)
+                new_node = tree.expand(node)
+                self.game_state.make_move(*tree.get_move(new_node))
                 return new_node
             else:
                 node = self.best_child(node)
@@ -110,11 +390,10 @@ class MonteCarloEngine:
     def best_child(self, node):
         """
         Selects best child node. Should use the UCB-Formula
+        Die UCB-Werte aller Kinder werden in MonteCarloTree.best_child gemeinsam berechnet.
         """
-        ucb_scores = [child.reward / node.visits + math.sqrt(2) * math.sqrt((2 * math.log(node.visits)) / child.visits)
-                      for child in node.children]
-        best_child = node.children[ucb_scores.index(max(ucb_scores))]
-        self.game_state.make_move(*best_child.move)
+        best_child = self.tree.best_child(node)
+        self.game_state.make_move(*self.tree.get_move(best_child))
         return best_child
 
     def simulate(self, node, depth):
@@ -141,16 +420,49 @@ class MonteCarloEngine:
         Backpropagates reward up to root node.
 
         """
-        while node.move:
-            node.visits += 1
-            node.reward += reward
-            reward = -reward
+        for _ in range(self.tree.backpropagate(node, reward, self.root_node)):
             self.game_state.undo_move()
-            node = node.parent
-        self.root_node.visits += 1
 
     def most_visited_child(self, node):
         """
         Returns the most visited node.
         """
-        return max(node.children, key=lambda child: child.visits).move
+        return self.tree.get_move(self.tree.most_visited_child(node))
+
+
+class RootParallelWorker(MonteCarloEngine):
+    """
+    MCTS in einem Worker-Prozess der Root-Parallelisierung. Meldet die Statistiken der Wurzelkinder
+    alle REPORT_INTERVAL Sekunden an den Koordinator statt sie auszugeben.
+    """
+
+    def __init__(self, worker_id, results, board, player) -> None:
+        super().__init__(board, player)
+        self.worker_id = worker_id
+        self.results = results
+        self.start = time.perf_counter()
+        self.last_report = self.start
+
+    def report(self, k):
+        now = time.perf_counter()
+        if now - self.last_report >= REPORT_INTERVAL:
+            self.last_report = now
+            self.send('simulations')
+
+    def send(self, kind):
+        tree = self.tree
+        children = {tree.get_move(child): (int(tree.visits[child]), float(tree.reward[child]))
+                    for child in tree.children(self.root_node)}
+        self.results.put((kind, self.worker_id, children, self.simulations, time.perf_counter() - self.start))
+
+
+def root_parallel_worker(worker_id, position, player, iterations, seed, batch_size, stop, results):
+    random.seed(seed)
+    engine = RootParallelWorker(worker_id, results, position, player)
+    engine.batch_size = batch_size
+    engine.rollout = BatchRollout(seed=seed)
+    engine.identity = player
+    engine.stop_event = SharedStopFlag(stop)
+
+    engine.mcts(iterations)
+    engine.send('done')
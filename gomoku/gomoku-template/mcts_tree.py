@@ -0,0 +1,202 @@
+import math
+import numpy as np
+
+"""
+In dieser Datei ist der Suchbaum der Monte-Carlo Tree Search als Spalten-Speicher implementiert.
+
+Jeder Knoten ist eine Zeile (Knoten-Id) in vorab allokierten NumPy-Spalten:
+
+    move:        Feld-Index row * 15 + col des Zuges, der zum Knoten führt
+    parent:      Id des Elternknotens (-1 für die Wurzel)
+    first_child: Id des ersten Kindes (-1, solange der Knoten keine Kinder hat)
+    child_count: Anzahl der reservierten Kinder
+    expanded:    Anzahl der bereits expandierten Kinder
+    visits:      Anzahl Besuche
+    reward:      Summe der Rewards
+
+Die Kinder eines Knotens liegen in einem zusammenhängenden Block. Der Block wird beim ersten Expandieren für
+alle Nachfolgerzüge in Expansionsreihenfolge reserviert, expandiert ist jeweils der Anfang des Blocks.
+Damit lässt sich die UCB-Formel für alle Kinder eines Knotens mit einer NumPy-Operation auswerten.
+Ein Knoten belegt 25 Bytes, reicht die Kapazität nicht aus, werden die Spalten verdoppelt.
+"""
+
+ROOT = 0
+DEFAULT_CAPACITY = 1 << 16
+SQRT2 = math.sqrt(2)
+
+COLUMNS = (('move', np.uint8), ('parent', np.int32), ('first_child', np.int32), ('child_count', np.int16),
+           ('expanded', np.int16), ('visits', np.int32), ('reward', np.float64))
+
+
+class MonteCarloTree:
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY) -> None:
+        self.capacity = capacity
+        for name, dtype in COLUMNS:
+            setattr(self, name, np.zeros(capacity, dtype))
+        self.size = 0
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Leert den Baum bis auf die Wurzel. Die Spalten bleiben allokiert.
+        """
+        self.size = 1
+        self.parent[ROOT] = -1
+        self.first_child[ROOT] = -1
+        self.child_count[ROOT] = 0
+        self.expanded[ROOT] = 0
+        self.visits[ROOT] = 0
+        self.reward[ROOT] = 0
+
+    def grow(self, needed: int) -> None:
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        for name, dtype in COLUMNS:
+            column = np.zeros(capacity, dtype)
+            column[:self.size] = getattr(self, name)[:self.size]
+            setattr(self, name, column)
+        self.capacity = capacity
+
+    def reserve_children(self, node: int, moves) -> None:
+        """
+        Reserviert den Kinder-Block von node für die Züge moves (Feld-Indizes in Expansionsreihenfolge).
+        """
+        count = len(moves)
+        first = self.size
+        if first + count > self.capacity:
+            self.grow(first + count)
+        end = first + count
+        self.move[first:end] = moves
+        self.parent[first:end] = node
+        self.first_child[first:end] = -1
+        self.child_count[first:end] = 0
+        self.expanded[first:end] = 0
+        self.visits[first:end] = 0
+        self.reward[first:end] = 0
+        self.first_child[node] = first
+        self.child_count[node] = count
+        self.size = end
+
+    def has_children(self, node: int) -> bool:
+        return self.first_child[node] >= 0
+
+    def is_fully_expanded(self, node: int) -> bool:
+        return self.expanded[node] >= self.child_count[node]
+
+    def expand(self, node: int) -> int:
+        """
+        Expandiert das nächste reservierte Kind von node und gibt dessen Id zurück.
+        """
+        child = int(self.first_child[node] + self.expanded[node])
+        self.expanded[node] += 1
+        return child
+
+    def children(self, node: int) -> range:
+        """
+        Ids der expandierten Kinder von node.
+        """
+        first = int(self.first_child[node])
+        return range(first, first + int(self.expanded[node])) if first >= 0 else range(0)
+
+    def find_child(self, node: int, move: int) -> int:
+        """
+        Gibt die Id des expandierten Kindes von node mit dem Feld-Index move zurück, sonst -1.
+        """
+        first = int(self.first_child[node])
+        if first < 0:
+            return -1
+        found = np.flatnonzero(self.move[first:first + int(self.expanded[node])] == move)
+        return first + int(found[0]) if len(found) else -1
+
+    def extract(self, node: int) -> None:
+        """
+        Macht den Teilbaum unter node zur neuen Wurzel. Die Knoten des Teilbaums werden in Breitensuche-Reihenfolge
+        an den Anfang neuer Spalten kopiert, so dass die Kinder-Blöcke zusammenhängend bleiben.
+        Der übrige Baum wird freigegeben.
+        """
+        first_child, child_count = self.first_child, self.child_count
+        # order[new_id] = alte Id, dazu die neuen Werte von parent und first_child
+        order = [node]
+        parents = [-1]
+        firsts = []
+        i = 0
+        while i < len(order):
+            first = int(first_child[order[i]])
+            if first >= 0:
+                count = int(child_count[order[i]])
+                firsts.append(len(order))
+                order.extend(range(first, first + count))
+                parents.extend([i] * count)
+            else:
+                firsts.append(-1)
+            i += 1
+
+        order = np.array(order, dtype=np.int64)
+        size = len(order)
+        for name, dtype in COLUMNS:
+            column = np.zeros(self.capacity, dtype)
+            column[:size] = getattr(self, name)[order]
+            setattr(self, name, column)
+        self.parent[:size] = parents
+        self.first_child[:size] = firsts
+        self.size = size
+
+    def get_move(self, node: int) -> tuple:
+        return divmod(int(self.move[node]), 15)
+
+    def best_child(self, node: int) -> int:
+        """
+        Gibt das Kind mit dem höchsten UCB-Wert zurück. Alle Kinder müssen expandiert (und damit besucht) sein.
+        """
+        first = int(self.first_child[node])
+        end = first + int(self.expanded[node])
+        visits = int(self.visits[node])
+        ucb_scores = (self.reward[first:end] / visits
+                      + SQRT2 * np.sqrt((2 * math.log(visits)) / self.visits[first:end]))
+        return first + int(np.argmax(ucb_scores))
+
+    def most_visited_child(self, node: int) -> int:
+        first = int(self.first_child[node])
+        return first + int(np.argmax(self.visits[first:first + int(self.expanded[node])]))
+
+    def top_visits(self, node: int) -> tuple[int, int]:
+        """
+        Besuche des meist- und des zweitmeistbesuchten Kindes von node (0, falls es keines gibt).
+        """
+        first = int(self.first_child[node])
+        visits = self.visits[first:first + int(self.expanded[node])] if first >= 0 else self.visits[:0]
+        if len(visits) < 2:
+            return (int(visits[0]) if len(visits) else 0), 0
+        second, best = np.partition(visits, len(visits) - 2)[-2:]
+        return int(best), int(second)
+
+    def backpropagate(self, node: int, reward: float, root: int = ROOT) -> int:
+        """
+        Addiert reward auf dem Pfad von node bis zur Wurzel (ausschließlich), mit wechselndem Vorzeichen.
+        Gibt die Länge des Pfades zurück.
+        """
+        visits, rewards, parent = self.visits, self.reward, self.parent
+        length = 0
+        while node != root:
+            visits[node] += 1
+            rewards[node] += reward
+            reward = -reward
+            node = int(parent[node])
+            length += 1
+        visits[root] += 1
+        return length
+
+    def add_reward(self, node: int, reward: float, root: int = ROOT) -> None:
+        """
+        Wie backpropagate, aber ohne die Besuche zu zählen (siehe MonteCarloEngine.mcts_batched).
+        """
+        rewards, parent = self.reward, self.parent
+        while node != root:
+            rewards[node] += reward
+            reward = -reward
+            node = int(parent[node])
+
+    def memory_bytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name, _ in COLUMNS)
@@ -0,0 +1,113 @@
+from bitboard import iter_bits
+from constants import Piece, Threats
+
+"""
+In dieser Datei ist die dynamische Zugsortierung der Alpha-Beta Suche implementiert.
+
+Die Züge eines Knotens werden in dieser Reihenfolge geliefert:
+    1. der beste Zug aus der Transpositionstabelle,
+    2. taktische Züge: statisches Threat-Potenzial (GameState.iter_moves) von mindestens TACTICAL, also Züge,
+       die einen Vierer bilden oder verhindern. Sie entscheiden die Stellung und dürfen nicht hinter Killer-
+       und History-Zügen landen.
+    3. die Killer-Züge der Ebene: die letzten Züge, die in Geschwisterknoten einen Cutoff ausgelöst haben,
+    4. Züge mit positivem Wert in der History-Tabelle des Spielers, absteigend,
+    5. alle übrigen Züge nach dem statischen Threat-Potenzial.
+Ein Cutoff trägt den Zug als Killer seiner Ebene ein und erhöht seinen History-Wert um remaining_depth².
+Jeder Zug wird nur einmal geliefert, nur aktive Felder kommen in Frage.
+
+get_statistics gibt die Cutoffs je Quelle und den Anteil der Cutoffs durch den ersten Zug zurück.
+"""
+
+TT_MOVE, TACTICAL_MOVE, KILLER, HISTORY, STATIC = range(5)
+SOURCES = ('tt', 'tactical', 'killer', 'history', 'static')
+TACTICAL = Threats.BLOCKED_FOUR.value
+KILLERS_PER_PLY = 2
+# Übersteigt ein History-Wert diese Grenze, werden alle Werte halbiert
+HISTORY_LIMIT = 1 << 20
+
+
+class MoveOrdering:
+
+    def __init__(self) -> None:
+        self.clear()
+
+    def clear(self) -> None:
+        # killers[ply] = Feld-Indizes, der jüngste Killer zuerst
+        self.killers = []
+        self.history = {Piece.BLACK.value: [0] * 225, Piece.WHITE.value: [0] * 225}
+
+        # Statistiken
+        self.cutoffs = [0] * len(SOURCES)
+        self.first_move_cutoffs = 0
+
+    def iter_moves(self, game_state, ply: int, tt_move=None):
+        """
+        Liefert die Züge (row, col, Quelle) des Knotens auf Ebene ply. tt_move ist (row, col) oder None.
+        """
+        active = game_state.active
+        seen = 0
+        if tt_move is not None:
+            idx = tt_move[0] * 15 + tt_move[1]
+            if active >> idx & 1:
+                seen |= 1 << idx
+                yield tt_move[0], tt_move[1], TT_MOVE
+
+        # Die statische Sortierung läuft weiter, der erste nicht taktische Zug wartet bis nach der History
+        static = game_state.iter_moves()
+        pending = None
+        for row, col, score in static:
+            if score < TACTICAL:
+                pending = row, col
+                break
+            if not seen >> (row * 15 + col) & 1:
+                seen |= 1 << (row * 15 + col)
+                yield row, col, TACTICAL_MOVE
+
+        if ply < len(self.killers):
+            for idx in self.killers[ply]:
+                if active >> idx & 1 and not seen >> idx & 1:
+                    seen |= 1 << idx
+                    yield idx // 15, idx % 15, KILLER
+
+        history = self.history[game_state.player]
+        candidates = sorted(((history[idx], idx) for idx in iter_bits(active & ~seen) if history[idx] > 0),
+                            reverse=True)
+        for _, idx in candidates:
+            seen |= 1 << idx
+            yield idx // 15, idx % 15, HISTORY
+
+        if pending is not None and not seen >> (pending[0] * 15 + pending[1]) & 1:
+            yield pending[0], pending[1], STATIC
+        for row, col, _ in static:
+            if not seen >> (row * 15 + col) & 1:
+                yield row, col, STATIC
+
+    def cutoff(self, ply: int, player: int, move, remaining_depth: int, index: int, source: int) -> None:
+        """
+        Wird bei einem Cutoff durch move, den index-ten Zug des Knotens aus der Quelle source, aufgerufen.
+        """
+        self.cutoffs[source] += 1
+        if index == 0:
+            self.first_move_cutoffs += 1
+
+        idx = move[0] * 15 + move[1]
+        killers = self.killers
+        while len(killers) <= ply:
+            killers.append([])
+        if idx in killers[ply]:
+            killers[ply].remove(idx)
+        killers[ply].insert(0, idx)
+        del killers[ply][KILLERS_PER_PLY:]
+
+        history = self.history[player]
+        history[idx] += remaining_depth * remaining_depth
+        if history[idx] > HISTORY_LIMIT:
+            self.history[player] = [value // 2 for value in history]
+
+    def get_statistics(self) -> dict:
+        cutoffs = sum(self.cutoffs)
+        return {
+            'cutoffs': cutoffs,
+            'cutoffs_by_source': dict(zip(SOURCES, self.cutoffs)),
+            'first_move_cutoff_rate': self.first_move_cutoffs / cutoffs if cutoffs else 0.0,
+        }
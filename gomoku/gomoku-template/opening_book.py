@@ -0,0 +1,208 @@
+import argparse
+import mmap
+import os
+import struct
+import time
+from bisect import bisect_left
+from bitboard import INVERSE_SYMMETRIES, SYMMETRIES
+from constants import Piece
+from pattern_table import EVALUATOR_VERSION
+from zobrist import BLACK_KEYS, Zobrist
+from zobrist import canonical_key as canonical_hash
+
+"""
+In dieser Datei ist das Eröffnungsbuch implementiert.
+
+Das Buch ist eine sortierte Binärdatei aus Einträgen fester Länge (RECORD):
+    key:   kanonischer Zobrist-Hash der Stellung inklusive Spieler am Zug
+    move:  Feld-Index row * 15 + col des besten Zuges in der kanonischen Orientierung
+    depth: Suchtiefe, mit der der Zug bestimmt wurde
+    score: Bewertung der Suche aus Sicht von Schwarz
+
+Der kanonische Hash ist der kleinste Hash der 8 symmetrischen Bilder der Stellung (siehe bitboard.SYMMETRIES),
+symmetrische Stellungen teilen sich also einen Eintrag. Die Engines öffnen die Datei per mmap und suchen den
+Schlüssel binär, es wird also nichts vorab geladen.
+
+Das Buch wird offline mit `python opening_book.py` aus Alpha-Beta Suchen erzeugt (siehe build_book).
+"""
+
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'opening_book.bin')
+MAGIC = b'GMKOB2'
+# Header: MAGIC, erster Zobrist-Schlüssel (erkennt Bücher mit anderen Schlüsseln), Version der Bewertung
+# (erkennt Bücher, die mit einer anderen Bewertung erzeugt wurden, siehe pattern_table.EVALUATOR_VERSION)
+# und Anzahl Einträge
+HEADER = struct.Struct('<6sQQQ')
+RECORD = struct.Struct('<QHHf')
+KEY = struct.Struct('<Q')
+
+_book = None
+
+
+def canonical_key(board: list[list[int]], player: int) -> tuple[int, int]:
+    """
+    Gibt den kanonischen Zobrist-Hash der Stellung und die Symmetrie zurück, die die Stellung in die
+    kanonische Orientierung überführt.
+    """
+    return canonical_hash(Zobrist().hash_board_symmetric(board, player))
+
+
+class _Keys:
+    """
+    Sequenz-Sicht auf die Schlüssel der Einträge für bisect.
+    """
+
+    def __init__(self, buffer, count: int) -> None:
+        self.buffer = buffer
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, i: int) -> int:
+        return KEY.unpack_from(self.buffer, HEADER.size + i * RECORD.size)[0]
+
+
+class OpeningBook:
+
+    def __init__(self, path: str = BOOK_PATH) -> None:
+        self.path = path
+        self.file = None
+        self.buffer = None
+        self.count = 0
+
+        # Statistiken
+        self.hits = 0
+        self.misses = 0
+
+        try:
+            self.file = open(path, 'rb')
+            self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            self.close()
+            return
+        if len(self.buffer) < HEADER.size:
+            self.close()
+            return
+        magic, first_key, version, count = HEADER.unpack_from(self.buffer, 0)
+        if (magic != MAGIC or first_key != BLACK_KEYS[0] or version != EVALUATOR_VERSION
+                or len(self.buffer) != HEADER.size + count * RECORD.size):
+            self.close()
+            return
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self) -> None:
+        if self.buffer is not None:
+            self.buffer.close()
+        if self.file is not None:
+            self.file.close()
+        self.buffer, self.file, self.count = None, None, 0
+
+    def probe(self, key: int):
+        """
+        Sucht den Eintrag zum kanonischen Hash key. Gibt (move, depth, score) in kanonischer Orientierung
+        oder None zurück.
+        """
+        if not self.count:
+            return None
+        keys = _Keys(self.buffer, self.count)
+        i = bisect_left(keys, key)
+        if i == self.count or keys[i] != key:
+            return None
+        _, move, depth, score = RECORD.unpack_from(self.buffer, HEADER.size + i * RECORD.size)
+        return move, depth, score
+
+    def lookup(self, board: list[list[int]], player: int):
+        """
+        Gibt den Buchzug (row, col) für die Stellung oder None zurück.
+        """
+        key, transform = canonical_key(board, player)
+        entry = self.probe(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        row, col = divmod(SYMMETRIES[INVERSE_SYMMETRIES[transform]][entry[0]], 15)
+        if board[row][col] != 0:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row, col
+
+
+def get_book() -> OpeningBook:
+    """
+    Gibt das prozessweite Eröffnungsbuch zurück. Ohne Buchdatei ist es leer.
+    """
+    global _book
+    if _book is None:
+        _book = OpeningBook()
+    return _book
+
+
+def write_book(entries: dict, path: str = BOOK_PATH) -> None:
+    """
+    Schreibt die Einträge {key: (move, depth, score)} sortiert in die Buchdatei.
+    """
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, BLACK_KEYS[0], EVALUATOR_VERSION, len(entries)))
+        for key in sorted(entries):
+            move, depth, score = entries[key]
+            f.write(RECORD.pack(key, move, depth, score))
+
+
+def build_book(plies: int, depth: int, branching: int) -> dict:
+    """
+    Durchsucht alle Stellungen bis plies Halbzüge ab dem leeren Brett mit Alpha-Beta bis zur Tiefe depth.
+    Fortgesetzt wird jeweils mit dem gefundenen Zug und den branching - 1 besten weiteren Zügen nach
+    GameState.get_sorted_moves. Symmetrische Stellungen werden nur einmal durchsucht.
+    """
+    from alpha_beta_engine import AlphaBetaEngine
+    from game_state import GameState
+
+    entries = {}
+    frontier = [[[0] * 15 for _ in range(15)]]
+    player = Piece.BLACK.value
+    for ply in range(plies + 1):
+        next_frontier = []
+        for board in frontier:
+            key, transform = canonical_key(board, player)
+            if key in entries:
+                continue
+            engine = AlphaBetaEngine([row[:] for row in board], player, threat_nodes=0)
+            engine.identity = player
+            engine.iterative_deepening(depth)
+            row, col = engine.current_result
+            entries[key] = (SYMMETRIES[transform][row * 15 + col], depth, engine.current_score)
+            print(f'ply: {ply}, positions: {len(entries)}, move: {(row, col)}, eval: {engine.current_score}')
+
+            if ply == plies:
+                continue
+            moves = [(row, col)]
+            for r, c, _ in GameState([line[:] for line in board], player).get_sorted_moves():
+                if len(moves) >= branching:
+                    break
+                if (r, c) not in moves:
+                    moves.append((r, c))
+            for r, c in moves:
+                child = [line[:] for line in board]
+                child[r][c] = player
+                next_frontier.append(child)
+        frontier = next_frontier
+        player = -player
+    return entries
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Erzeugt das Eröffnungsbuch aus Alpha-Beta Suchen.')
+    parser.add_argument('--plies', type=int, default=3)
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--branching', type=int, default=3)
+    parser.add_argument('--output', default=BOOK_PATH)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    book = build_book(args.plies, args.depth, args.branching)
+    write_book(book, args.output)
+    print(f'{len(book)} positions written to {args.output} in {time.perf_counter() - start:.1f}s')
@@ -0,0 +1,19 @@
+"""
+Hilfsmittel für die Suche in mehreren Prozessen (Lazy-SMP in alpha_beta_engine.py, Root-Parallelisierung in mcts.py).
+"""
+
+
+class SharedStopFlag:
+    """
+    Stoppsignal eines Koordinators mit der Schnittstelle von threading.Event.
+    Der Wert ist ein multiprocessing.RawValue in Shared Memory und wird ohne Lock gelesen.
+    """
+
+    def __init__(self, value) -> None:
+        self.value = value
+
+    def is_set(self) -> bool:
+        return self.value.value != 0
+
+    def set(self) -> None:
+        self.value.value = 1
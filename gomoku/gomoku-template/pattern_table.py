@@ -0,0 +1,187 @@
+import hashlib
+import os
+from array import array
+from constants import Threats
+
+"""
+In dieser Datei wird die Lookup-Tabelle der Linienmuster erzeugt, gespeichert und geladen.
+
+Die Bewertung eines Feldes in einer Richtung hängt nur von den jeweils 5 Nachbarfeldern links
+und rechts ab: ausgehend vom Feld wird in jede Richtung gelaufen, bis ein blockiertes Feld, das
+zweite leere Feld oder das fünfte Feld erreicht ist (siehe window_to_sequence). Jedes Nachbarfeld wird relativ zum bewertenden Spieler
+als Ziffer zur Basis 3 kodiert:
+
+    0 = leer, 1 = eigener Stein, 2 = blockiert (gegnerischer Stein oder Brettrand)
+
+Das nächste Nachbarfeld ist jeweils die niederwertigste Ziffer. Der Index eines Fensters ist
+left * 243 + right, es gibt also 3^10 = 59049 Fenster. Für jedes Fenster speichert die Tabelle die
+beiden stärksten Bedrohungen als Paar-Code first * CODES + second (first >= second).
+Die Threat-Codes sind aufsteigend nach Gewichtung sortiert, Code 0 ist Threats.NONE.
+
+Da Evaluator.evaluate nur die Summe der beiden stärksten Bedrohungen über alle Richtungen verwendet,
+lassen sich die Paare zweier Richtungen über PAIR_MERGE wieder zu einem Paar zusammenfassen.
+"""
+
+SIDE_WINDOWS = 3 ** 5
+WINDOWS = SIDE_WINDOWS * SIDE_WINDOWS
+
+THREAT_ORDER = tuple(sorted(Threats, key=lambda t: t.value))
+THREAT_CODES = {t: code for code, t in enumerate(THREAT_ORDER)}
+THREAT_VALUES = tuple(t.value for t in THREAT_ORDER)
+CODES = len(THREAT_ORDER)
+PAIRS = CODES * CODES
+
+# PAIR_VALUES[pair] = Summe der Gewichtungen beider Bedrohungen des Paares
+PAIR_VALUES = tuple(THREAT_VALUES[pair // CODES] + THREAT_VALUES[pair % CODES] for pair in range(PAIRS))
+# PAIR_MERGE[a * PAIRS + b] = Paar der beiden stärksten Bedrohungen aus den Paaren a und b
+PAIR_MERGE = array('B', bytes(PAIRS * PAIRS))
+for _a in range(PAIRS):
+    for _b in range(PAIRS):
+        _codes = sorted((_a // CODES, _a % CODES, _b // CODES, _b % CODES), reverse=True)
+        PAIR_MERGE[_a * PAIRS + _b] = _codes[0] * CODES + _codes[1]
+
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pattern_table.bin')
+MAGIC = b'GMKPT3'
+
+# SIDE_DIGITS[own | blocked << 5] = Basis-3 Wert der 5 Felder einer Seite, Bit 0 ist das nächste Feld.
+# SIDE_DIGITS_REVERSED entsprechend für die linke Seite der Linien-Masken, dort ist Bit 4 das nächste Feld.
+SIDE_DIGITS = array('l', [0] * 1024)
+SIDE_DIGITS_REVERSED = array('l', [0] * 1024)
+for _own in range(32):
+    for _blocked in range(32):
+        if _own & _blocked:
+            continue
+        for _i in range(5):
+            _digit = 1 if (_own >> _i) & 1 else 2 if (_blocked >> _i) & 1 else 0
+            SIDE_DIGITS[_own | _blocked << 5] += _digit * 3 ** _i
+            SIDE_DIGITS_REVERSED[_own | _blocked << 5] += _digit * 3 ** (4 - _i)
+
+_table = None
+
+
+def decode_side(value: int) -> list[int]:
+    """
+    Wandelt den Basis-3 Wert einer Seite in die Ziffern (nächstes Feld zuerst) um.
+    """
+    digits = []
+    for _ in range(5):
+        digits.append(value % 3)
+        value //= 3
+    return digits
+
+
+def window_to_sequence(index: int) -> tuple:
+    """
+    Erzeugt zu einem Fenster-Index die Sequenz, die Evaluator.get_threats_in_line für den
+    Spieler 1 klassifiziert.
+    """
+    def walk(digits):
+        seq = []
+        empty = 0
+        for digit in digits:
+            if digit == 2:
+                seq.append(-1)
+                break
+            if digit == 0:
+                seq.append(0)
+                if empty > 0:
+                    break
+                empty += 1
+            else:
+                seq.append(1)
+        return seq
+
+    left, right = divmod(index, SIDE_WINDOWS)
+    seq = walk(decode_side(left))
+    seq.reverse()
+    seq.append(1)
+    seq += walk(decode_side(right))
+    return tuple(seq)
+
+
+def build_table() -> array:
+    """
+    Zählt alle Fenster auf und klassifiziert sie mit Evaluator.get_threats_in_line.
+    """
+    from evaluator import Evaluator
+
+    table = array('B', bytes(WINDOWS))
+    # Die Klassifikation selbst benötigt die Tabelle nicht
+    evaluator = Evaluator(table)
+    by_sequence = {}
+
+    def classify(seq: tuple) -> int:
+        if seq not in by_sequence:
+            codes = sorted((THREAT_CODES[t] for t in evaluator.get_threats_in_line(seq, 1)), reverse=True)
+            codes += [0, 0]
+            by_sequence[seq] = codes[0] * CODES + codes[1]
+        return by_sequence[seq]
+
+    for index in range(WINDOWS):
+        table[index] = classify_symmetric(window_to_sequence(index), classify)
+    return table
+
+
+def classify_symmetric(seq: tuple, classify) -> int:
+    """
+    Klassifiziert eine Sequenz unabhängig von der Leserichtung. get_threats_in_line liest von links nach rechts
+    und bewertet eine Sequenz und ihre Spiegelung teilweise verschieden (z.B. __XXXX| als offene, |XXXX__ als
+    blockierte Vier). Spiegelbildliche Stellungen müssen aber gleich bewertet werden, da die Transpositionstabelle
+    und die Caches symmetrische Stellungen zusammenfassen (siehe zobrist.canonical_key):
+        - ist nur eine Seite blockiert, wird die Sequenz mit der blockierten Seite links klassifiziert,
+        - sonst gilt die stärkere der beiden Lesarten.
+    """
+    reverse = seq[::-1]
+    left_blocked, right_blocked = seq[0] == -1, seq[-1] == -1
+    if left_blocked != right_blocked:
+        return classify(seq if left_blocked else reverse)
+    return max(classify(seq), classify(reverse))
+
+
+def _header() -> bytes:
+    # Die Gewichtungen sind Teil des Headers, damit eine veraltete Datei nach Änderungen in constants.py verworfen wird.
+    return MAGIC + repr(THREAT_VALUES).encode('ascii').ljust(256)
+
+
+# Kennung der Bewertung (Tabellenformat und Gewichtungen). Gespeicherte Bewertungen (Eröffnungsbuch,
+# Analyse-Speicher) tragen sie mit und werden verworfen, wenn sie nicht mehr passt.
+EVALUATOR_VERSION = int.from_bytes(hashlib.blake2b(_header(), digest_size=8).digest(), 'little')
+
+
+def save_table(table: array, path: str = TABLE_PATH) -> None:
+    with open(path, 'wb') as f:
+        f.write(_header())
+        table.tofile(f)
+
+
+def load_table(path: str = TABLE_PATH):
+    """
+    Lädt die Tabelle aus der Binärdatei. Gibt None zurück, wenn die Datei fehlt
+    oder nicht zu den aktuellen Threat-Gewichtungen passt.
+    """
+    try:
+        with open(path, 'rb') as f:
+            if f.read(len(_header())) != _header():
+                return None
+            table = array('B')
+            table.fromfile(f, WINDOWS)
+            return table
+    except (OSError, EOFError):
+        return None
+
+
+def get_table() -> array:
+    """
+    Gibt die prozessweite Tabelle zurück. Sie wird beim ersten Aufruf aus der mitgelieferten
+    Binärdatei geladen bzw. neu erzeugt, falls diese fehlt.
+    """
+    global _table
+    if _table is None:
+        table = load_table()
+        _table = table if table is not None else build_table()
+    return _table
+
+
+if __name__ == '__main__':
+    save_table(build_table())
+    print(f'{WINDOWS} windows written to {TABLE_PATH}')
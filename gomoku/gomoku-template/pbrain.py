@@ -0,0 +1,197 @@
+import argparse
+import sys
+from alpha_beta_engine import AlphaBetaEngine
+from constants import Piece
+from mcts import MonteCarloEngine
+from time_control import TimeControl
+
+"""
+In dieser Datei ist ein Front-End für das Piskvork/Gomocup-Protokoll über stdin/stdout implementiert.
+
+Damit laufen die Engines ohne GUI, z.B. in Turnier-Managern:
+    python pbrain.py [--engine alpha-beta|mcts]
+
+Unterstützt werden START, RESTART, BEGIN, TURN, BOARD ... DONE, TAKEBACK, INFO, ABOUT und END.
+Koordinaten im Protokoll sind "x,y" mit x = Spalte und y = Zeile. Die Engine spielt die Farbe des Spielers am
+Zug: bei gleich vielen Steinen Schwarz, sonst Weiß. Die Engine-Instanz bleibt über die Züge einer Partie erhalten.
+Die Ausgaben der Engines gehen nach stderr, stdout ist dem Protokoll vorbehalten.
+
+Bedenkzeit aus INFO (in Millisekunden): timeout_turn wird die Zeit je Zug, time_left die Restzeit der Partie.
+timeout_turn 0 bedeutet so schnell wie möglich (FAST_MOVE_TIME).
+"""
+
+SIZE = 15
+ENGINES = {'alpha-beta': AlphaBetaEngine, 'mcts': MonteCarloEngine}
+# Vorgaben von Piskvork, solange kein INFO kommt
+DEFAULT_TIMEOUT_TURN = 30000
+FAST_MOVE_TIME = 0.1
+OWN, OPPONENT = 1, 2
+
+
+class PbrainProtocol:
+
+    def __init__(self, engine: str = 'alpha-beta', output=None) -> None:
+        self.engine_name = engine
+        self.engine = None
+        self.output = sys.stdout if output is None else output
+        # Felder: 0 frei, OWN eigene Steine, OPPONENT gegnerische Steine
+        self.board = [[0] * SIZE for _ in range(SIZE)]
+        # Zeilen einer BOARD-Übertragung bis DONE, sonst None
+        self.board_lines = None
+        self.timeout_turn = DEFAULT_TIMEOUT_TURN
+        self.time_left = None
+        self.running = True
+
+    def send(self, text: str) -> None:
+        self.output.write(text + '\n')
+        self.output.flush()
+
+    def handle(self, line: str) -> None:
+        line = line.strip()
+        if not line:
+            return
+        if self.board_lines is not None:
+            if line.upper() == 'DONE':
+                self.load_board(self.board_lines)
+                self.board_lines = None
+                self.play()
+            else:
+                self.board_lines.append(line)
+            return
+
+        command, _, argument = line.partition(' ')
+        command = command.upper()
+        if command == 'START':
+            self.start(argument)
+        elif command == 'RESTART':
+            self.reset()
+            self.send('OK')
+        elif command == 'BEGIN':
+            self.play()
+        elif command == 'TURN':
+            move = self.parse_move(argument)
+            if move is None:
+                return
+            self.board[move[1]][move[0]] = OPPONENT
+            self.play()
+        elif command == 'BOARD':
+            self.board_lines = []
+        elif command == 'TAKEBACK':
+            move = self.parse_move(argument)
+            if move is not None:
+                self.board[move[1]][move[0]] = 0
+                self.send('OK')
+        elif command == 'INFO':
+            self.info(argument)
+        elif command == 'ABOUT':
+            self.send(f'name="gomoku-{self.engine_name}", version="1.0"')
+        elif command == 'END':
+            self.running = False
+            if self.engine is not None:
+                self.engine.stop_evaluation()
+        else:
+            self.send(f'UNKNOWN command {command}')
+
+    def start(self, argument: str) -> None:
+        if argument.strip() != str(SIZE):
+            self.send(f'ERROR only board size {SIZE} is supported')
+            return
+        self.reset()
+        if self.engine is None:
+            self.engine = ENGINES[self.engine_name]()
+        self.send('OK')
+
+    def reset(self) -> None:
+        self.board = [[0] * SIZE for _ in range(SIZE)]
+        self.board_lines = None
+
+    def info(self, argument: str) -> None:
+        key, _, value = argument.strip().partition(' ')
+        try:
+            value = int(value)
+        except ValueError:
+            return
+        if key == 'timeout_turn':
+            self.timeout_turn = value
+        elif key == 'time_left':
+            self.time_left = value
+
+    def parse_move(self, argument: str):
+        try:
+            x, y = (int(part) for part in argument.split(',')[:2])
+        except ValueError:
+            self.send(f'ERROR invalid move {argument}')
+            return None
+        if not (0 <= x < SIZE and 0 <= y < SIZE):
+            self.send(f'ERROR move {argument} outside the board')
+            return None
+        return x, y
+
+    def load_board(self, lines: list) -> None:
+        self.reset()
+        for line in lines:
+            parts = line.split(',')
+            if len(parts) != 3:
+                continue
+            x, y, field = (int(part) for part in parts)
+            if 0 <= x < SIZE and 0 <= y < SIZE and field in (OWN, OPPONENT):
+                self.board[y][x] = field
+
+    def time_control(self) -> TimeControl:
+        move_time = self.timeout_turn / 1000 if self.timeout_turn > 0 else FAST_MOVE_TIME
+        total_time = self.time_left / 1000 if self.time_left is not None else None
+        return TimeControl(move_time=move_time, total_time=total_time)
+
+    def position(self) -> tuple[list[list[int]], int]:
+        """
+        Übersetzt das Brett in die Darstellung der Engines. Die Engine ist am Zug.
+        """
+        own = sum(row.count(OWN) for row in self.board)
+        opponent = sum(row.count(OPPONENT) for row in self.board)
+        player = Piece.BLACK.value if own == opponent else Piece.WHITE.value
+        pieces = {0: 0, OWN: player, OPPONENT: -player}
+        return [[pieces[field] for field in row] for row in self.board], player
+
+    def play(self) -> None:
+        if self.engine is None:
+            self.engine = ENGINES[self.engine_name]()
+        board, player = self.position()
+        engine = self.engine
+        engine.stop_evaluation()
+        engine.start_evaluation(board, player, time_control=self.time_control())
+        if engine.evaluation_thread is not None:
+            engine.evaluation_thread.join()
+        row, col = engine.get_results()
+        engine.evaluation_thread = None
+
+        if not (0 <= row < SIZE and 0 <= col < SIZE) or self.board[row][col] != 0:
+            row, col = self.fallback_move()
+        self.board[row][col] = OWN
+        self.send(f'{col},{row}')
+
+    def fallback_move(self) -> tuple[int, int]:
+        """
+        Freies Feld möglichst nahe der Mitte, falls die Engine keinen gültigen Zug geliefert hat.
+        """
+        center = SIZE // 2
+        return min(((row, col) for row in range(SIZE) for col in range(SIZE) if self.board[row][col] == 0),
+                   key=lambda move: max(abs(move[0] - center), abs(move[1] - center)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Piskvork/Gomocup-Protokoll für die Engines.')
+    parser.add_argument('--engine', choices=list(ENGINES), default='alpha-beta')
+    args = parser.parse_args()
+
+    output = sys.stdout
+    # Ausgaben der Engines dürfen das Protokoll nicht stören
+    sys.stdout = sys.stderr
+    protocol = PbrainProtocol(args.engine, output)
+    for line in sys.stdin:
+        protocol.handle(line)
+        if not protocol.running:
+            break
+
+
+if __name__ == '__main__':
+    main()
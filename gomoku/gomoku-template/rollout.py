@@ -0,0 +1,88 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from bitboard import CELLS, NEIGHBOURHOOD, SIZE
+from threat_scanner import heuristic_values
+
+"""
+In dieser Datei sind die gebündelten Simulationen (Rollouts) der Monte-Carlo Tree Search implementiert.
+
+Statt einer Simulation über GameState werden N Simulationen gleichzeitig auf einem (N, 15, 15) int8 Array
+gespielt. Jeder Schritt entspricht MonteCarloEngine.simulate: in allen noch laufenden Simulationen wird ein
+zufälliges aktives Feld (Abstand 1 oder 2 zu einem Stein, siehe bitboard.NEIGHBOURHOOD) besetzt.
+Eine Simulation endet nach depth Zügen oder sobald der gesetzte Stein eine Fünferreihe bildet.
+Der Reward ist die Bewertung der Endstellung aus Sicht von Schwarz (threat_scanner.heuristic_values, also dieselbe
+Heuristik wie GameState.get_heuristic_value), bzw. 0, falls kein Zug gespielt wurde.
+"""
+
+DEFAULT_DEPTH = 10
+CENTER = (SIZE // 2) * SIZE + SIZE // 2
+PAD = 4
+OFFSETS = np.arange(-PAD, PAD + 1)
+# (d_row, d_col) der vier Linienrichtungen
+LINE_STEPS = ((0, 1), (1, 0), (1, -1), (1, 1))
+
+# NEIGHBOURS[idx] = aktive Felder nach einem Zug auf idx (als bool-Zeile der Länge 225)
+NEIGHBOURS = np.array([[(NEIGHBOURHOOD[idx] >> cell) & 1 for cell in range(CELLS)] for idx in range(CELLS)], dtype=bool)
+
+
+def makes_five(padded: np.ndarray, boards: np.ndarray, moves: np.ndarray, players: np.ndarray) -> np.ndarray:
+    """
+    Prüft für jedes Brett in boards (Indizes in padded), ob der Stein von players auf moves eine Fünferreihe bildet.
+    """
+    rows = (moves // SIZE + PAD)[:, None]
+    cols = (moves % SIZE + PAD)[:, None]
+    five = np.zeros(len(boards), dtype=bool)
+    for d_row, d_col in LINE_STEPS:
+        line = padded[boards[:, None], rows + OFFSETS * d_row, cols + OFFSETS * d_col] == players[:, None]
+        five |= sliding_window_view(line, 5, axis=1).all(axis=2).any(axis=1)
+    return five
+
+
+class BatchRollout:
+
+    def __init__(self, depth: int = DEFAULT_DEPTH, seed=None) -> None:
+        self.depth = depth
+        self.rng = np.random.default_rng(seed)
+
+        # Statistiken
+        self.rollouts = 0
+        self.moves = 0
+
+    def score(self, boards: np.ndarray) -> np.ndarray:
+        return heuristic_values(boards)
+
+    def run(self, boards: np.ndarray, players: np.ndarray) -> np.ndarray:
+        """
+        Spielt von jedem Brett (N, 15, 15) mit players (N,) am Zug eine Simulation und gibt die Rewards (N,) zurück.
+        """
+        n = len(boards)
+        flat = boards.reshape(n, CELLS).astype(np.int8)
+        padded = np.zeros((n, SIZE + 2 * PAD, SIZE + 2 * PAD), dtype=np.int8)
+        padded[:, PAD:-PAD, PAD:-PAD] = boards
+        players = np.asarray(players, dtype=np.int8).copy()
+
+        occupied = flat != 0
+        active = (occupied.astype(np.float32) @ NEIGHBOURS.astype(np.float32) > 0) & ~occupied
+        alive = np.ones(n, dtype=bool)
+        moved = np.zeros(n, dtype=bool)
+        for _ in range(self.depth):
+            running = np.flatnonzero(alive)
+            if len(running) == 0:
+                break
+            candidates = active[running]
+            # Gleichverteilte Wahl unter den aktiven Feldern, auf dem leeren Brett die Mitte
+            choice = np.where(candidates, self.rng.random(candidates.shape), -1.0)
+            moves = choice.argmax(axis=1)
+            moves[~candidates.any(axis=1)] = CENTER
+
+            stones = players[running]
+            flat[running, moves] = stones
+            padded[running, moves // SIZE + PAD, moves % SIZE + PAD] = stones
+            active[running] = (candidates | NEIGHBOURS[moves]) & (flat[running] == 0)
+            moved[running] = True
+            alive[running[makes_five(padded, running, moves, stones)]] = False
+            players[running] = -stones
+            self.moves += len(running)
+
+        self.rollouts += n
+        return np.where(moved, self.score(flat.reshape(n, SIZE, SIZE)), 0.0)
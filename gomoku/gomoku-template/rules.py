@@ -0,0 +1,32 @@
+"""
+In dieser Datei sind die Spielregeln implementiert, die GUI, Turniere und Analyse gemeinsam verwenden.
+
+Gewonnen hat, wer mindestens fünf Steine in einer Reihe hat (horizontal, vertikal oder diagonal).
+Das Brett kann eine Liste von Listen oder ein NumPy-Array sein, Felder werden als board[row][col] gelesen.
+"""
+
+SIZE = 15
+DIRECTIONS = ((1, 0), (0, 1), (1, 1), (1, -1))
+
+
+def winning_line(board, row: int, col: int, player: int, size: int = SIZE):
+    """
+    Prüft, ob der Stein von player auf (row, col) Teil einer Fünferreihe ist.
+    Gibt die ersten fünf Felder der Reihe als Liste von (row, col) zurück, sonst None.
+    """
+    for d_row, d_col in DIRECTIONS:
+        line = []
+        for step in range(-4, 5):
+            r = row + step * d_row
+            c = col + step * d_col
+            if 0 <= r < size and 0 <= c < size and board[r][c] == player:
+                line.append((r, c))
+                if len(line) == 5:
+                    return line
+            else:
+                line = []
+    return None
+
+
+def is_full(board, size: int = SIZE) -> bool:
+    return all(board[row][col] != 0 for row in range(size) for col in range(size))
@@ -0,0 +1,228 @@
+import time
+
+"""
+In dieser Datei ist die Instrumentierung der Suchen implementiert.
+
+SearchStats wird einer Engine als engine.stats übergeben (standardmäßig None, dann entstehen keine Kosten).
+Zu Beginn einer Suche ersetzt attach_alpha_beta bzw. attach_mcts die gemessenen Methoden der Engine, ihres
+GameState und ihrer Tabellen durch zeitmessende Wrapper (als Instanz-Attribute), detach stellt sie am Ende wieder her.
+
+Die Zeiten werden exklusiv gemessen: ruft eine gemessene Methode eine andere auf, zählt deren Zeit nur für die
+innere Kategorie. Zeit außerhalb aller gemessenen Methoden erscheint als 'other'.
+
+Lesbar ist die Statistik jederzeit über snapshot(). Zusätzlich wird listener(event) aufgerufen:
+    'depth':    nach jeder vollständig durchsuchten Tiefe von Alpha-Beta (mit den Werten dieser Iteration)
+    'interval': höchstens alle interval Sekunden während der Suche
+    'done':     am Ende der Suche
+"""
+
+CATEGORIES = ('evaluation', 'move_generation', 'make_undo', 'selection', 'simulation', 'backpropagation')
+DEFAULT_INTERVAL = 1.0
+
+
+class SearchStats:
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL, listener=None) -> None:
+        self.interval = interval
+        self.listener = listener
+        self.engine = None
+        self.patched = []
+        self.reset()
+
+    def reset(self) -> None:
+        self.start = time.perf_counter()
+        self.last_event = self.start
+        self.timers = dict.fromkeys(CATEGORIES, 0.0)
+        # Zeit der inneren Aufrufe je offener Messung (für die exklusiven Zeiten)
+        self.stack = []
+        self.tt_probes = 0
+        self.tt_hits = 0
+        # cutoffs[i] = Anzahl Cutoffs durch den i-ten untersuchten Zug eines Knotens
+        self.cutoffs = []
+        # Aufrufe von iter_moves (innere Knoten) und daraus gelieferte Züge
+        self.expansions = 0
+        self.children = 0
+        self.depths = []
+        self.last_depth = {'nodes': 0, 'time': 0.0, 'tt_hits': 0, 'cutoffs': 0}
+
+    def attach_alpha_beta(self, engine) -> None:
+        self.attach(engine)
+        game_state = engine.game_state
+        self.wrap(game_state, 'make_move', 'make_undo', tick=True)
+        self.wrap(game_state, 'undo_move', 'make_undo')
+        self.wrap(game_state, 'evaluate_cell', 'evaluation')
+        self.wrap(game_state, 'update_threat_pairs', 'evaluation')
+        self.wrap_generator(game_state, 'iter_moves', 'move_generation')
+        self.wrap(game_state, 'get_sorted_moves', 'move_generation')
+        self.wrap_probe(engine.transposition_table)
+
+        report = engine.report
+
+        def report_depth(depth, score, move):
+            report(depth, score, move)
+            self.end_depth(depth)
+        self.patch(engine, 'report', report_depth)
+
+    def attach_mcts(self, engine) -> None:
+        self.attach(engine)
+        game_state = engine.game_state
+        self.wrap(game_state, 'make_move', 'make_undo', tick=True)
+        self.wrap(game_state, 'undo_move', 'make_undo')
+        self.wrap(game_state, 'evaluate_cell', 'evaluation')
+        self.wrap(game_state, 'update_threat_pairs', 'evaluation')
+        self.wrap_generator(game_state, 'iter_moves', 'move_generation')
+        self.wrap(game_state, 'get_sorted_moves', 'move_generation')
+        self.wrap(engine, 'tree_policy', 'selection')
+        self.wrap(engine, 'best_child', 'selection')
+        self.wrap(engine, 'simulate', 'simulation')
+        self.wrap(engine.rollout, 'run', 'simulation', tick=True)
+        self.wrap(engine.tree, 'backpropagate', 'backpropagation')
+        self.wrap(engine.tree, 'add_reward', 'backpropagation')
+
+    def attach(self, engine) -> None:
+        self.detach()
+        self.reset()
+        self.engine = engine
+
+    def detach(self) -> None:
+        """
+        Entfernt alle Wrapper, danach gelten wieder die Methoden der Klassen.
+        """
+        for obj, name in reversed(self.patched):
+            delattr(obj, name)
+        self.patched = []
+
+    def patch(self, obj, name: str, wrapper) -> None:
+        setattr(obj, name, wrapper)
+        self.patched.append((obj, name))
+
+    def wrap(self, obj, name: str, category: str, tick: bool = False) -> None:
+        method = getattr(obj, name)
+        timers, stack, clock = self.timers, self.stack, time.perf_counter
+
+        def timed(*args):
+            start = clock()
+            stack.append(0.0)
+            try:
+                return method(*args)
+            finally:
+                end = clock()
+                elapsed = end - start
+                timers[category] += elapsed - stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+                if tick and end - self.last_event >= self.interval:
+                    self.emit('interval', end)
+        self.patch(obj, name, timed)
+
+    def wrap_generator(self, obj, name: str, category: str) -> None:
+        """
+        Wie wrap, gemessen wird aber jeder Schritt des Generators. Zählt zusätzlich innere Knoten und Züge.
+        """
+        method = getattr(obj, name)
+        timers, stack, clock = self.timers, self.stack, time.perf_counter
+
+        def timed(*args):
+            self.expansions += 1
+            generator = method(*args)
+            while True:
+                start = clock()
+                stack.append(0.0)
+                try:
+                    item = next(generator)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed = clock() - start
+                    timers[category] += elapsed - stack.pop()
+                    if stack:
+                        stack[-1] += elapsed
+                self.children += 1
+                yield item
+        self.patch(obj, name, timed)
+
+    def wrap_probe(self, table) -> None:
+        probe = table.probe
+
+        def counted(key):
+            entry = probe(key)
+            self.tt_probes += 1
+            if entry is not None:
+                self.tt_hits += 1
+            return entry
+        self.patch(table, 'probe', counted)
+
+    def cutoff(self, index: int) -> None:
+        """
+        Wird von der Suche bei einem Cutoff durch den index-ten Zug eines Knotens aufgerufen.
+        """
+        cutoffs = self.cutoffs
+        if index >= len(cutoffs):
+            cutoffs.extend([0] * (index + 1 - len(cutoffs)))
+        cutoffs[index] += 1
+
+    def nodes(self) -> int:
+        engine = self.engine
+        if engine is None:
+            return 0
+        return engine.nodes if hasattr(engine, 'nodes') else engine.simulations
+
+    def end_depth(self, depth: int) -> None:
+        """
+        Hält die Werte der gerade abgeschlossenen Iteration fest. Der effektive Verzweigungsfaktor ist das
+        Verhältnis der Knoten dieser und der vorherigen Iteration.
+        """
+        now = time.perf_counter() - self.start
+        nodes, cutoffs, last = self.nodes(), sum(self.cutoffs), self.last_depth
+        record = {
+            'depth': depth,
+            'nodes': nodes - last['nodes'],
+            'time': now - last['time'],
+            'tt_hits': self.tt_hits - last['tt_hits'],
+            'cutoffs': cutoffs - last['cutoffs'],
+        }
+        previous = self.depths[-1]['nodes'] if self.depths else 0
+        record['effective_branching_factor'] = record['nodes'] / previous if previous else 0.0
+        self.depths.append(record)
+        self.last_depth = {'nodes': nodes, 'time': now, 'tt_hits': self.tt_hits, 'cutoffs': cutoffs}
+        if self.listener is not None:
+            self.listener({'event': 'depth', **record})
+
+    def snapshot(self) -> dict:
+        elapsed = time.perf_counter() - self.start
+        nodes = self.nodes()
+        cutoffs = sum(self.cutoffs)
+        caches = {}
+        engine = self.engine
+        if engine is not None:
+            caches['sorted_moves'] = engine.game_state.sorted_moves.get_statistics()['hit_rate']
+            if hasattr(engine, 'transposition_table'):
+                caches['transposition_table'] = self.tt_hits / self.tt_probes if self.tt_probes else 0.0
+        ordering = engine.move_ordering.get_statistics() if hasattr(engine, 'move_ordering') else None
+        measured = sum(self.timers.values())
+        branching = self.children / self.expansions if self.expansions else 0.0
+        if engine is not None and hasattr(engine, 'tree'):
+            # MCTS: mittlere Anzahl expandierter Kinder der expandierten Knoten
+            expanded = engine.tree.expanded[:engine.tree.size]
+            expanded = expanded[expanded > 0]
+            branching = float(expanded.mean()) if len(expanded) else 0.0
+        return {
+            'elapsed': elapsed,
+            'nodes': nodes,
+            'nodes_per_second': nodes / elapsed if elapsed > 0 else 0.0,
+            'tt_probes': self.tt_probes,
+            'tt_hits': self.tt_hits,
+            'cutoffs': cutoffs,
+            'cutoffs_by_move': list(self.cutoffs),
+            'first_move_cutoff_rate': self.cutoffs[0] / cutoffs if cutoffs else 0.0,
+            'move_ordering': ordering,
+            'time': {**self.timers, 'other': max(0.0, elapsed - measured)},
+            'cache_hit_rates': caches,
+            'branching_factor': branching,
+            'depths': [dict(record) for record in self.depths],
+        }
+
+    def emit(self, event: str, now: float = None) -> None:
+        self.last_event = time.perf_counter() if now is None else now
+        if self.listener is not None:
+            self.listener({'event': event, **self.snapshot()})
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Die Module liegen flach in gomoku-template und werden ohne Paket importiert
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+from evaluator import Evaluator
+from game_state import GameState
+
+"""
+Inkrementelle Bewertung in make_move/undo_move gegen die vollständige Neuberechnung.
+"""
+
+GAMES = 20
+MOVES = 40
+
+
+def direct_value(board) -> float:
+    """
+    Heuristik aus Sicht von Schwarz ohne GameState: Summe der Bewertungen aller besetzten Felder.
+    """
+    evaluator = Evaluator()
+    return sum(board[row][col] * evaluator.evaluate(board, row, col, board[row][col])
+               for row in range(15) for col in range(15) if board[row][col])
+
+
+def snapshot(game_state) -> tuple:
+    return (game_state.heuristic_value, list(game_state.cell_scores), list(game_state.threat_pairs[1]),
+            list(game_state.threat_pairs[-1]), game_state.active, game_state.symmetric_hashes, game_state.player)
+
+
+@pytest.mark.parametrize('seed', range(GAMES))
+def test_incremental_matches_direct_evaluation(seed):
+    rng = random.Random(seed)
+    game_state = GameState()
+    snapshots = []
+    for _ in range(MOVES):
+        snapshots.append(snapshot(game_state))
+        # Zufällig unter den besten Zügen, damit Drohungen entstehen
+        row, col, _ = rng.choice(game_state.get_sorted_moves()[:6])
+        game_state.make_move(row, col)
+        assert game_state.get_heuristic_value() == pytest.approx(direct_value(game_state.board))
+        assert game_state.verify()
+
+    while game_state.move_history:
+        game_state.undo_move()
+        assert snapshot(game_state) == snapshots.pop()
+        assert game_state.get_heuristic_value() == pytest.approx(direct_value(game_state.board))
+    assert game_state.get_heuristic_value() == 0
+
+
+@pytest.mark.parametrize('seed', range(GAMES))
+def test_board_import_matches_played_game(seed):
+    rng = random.Random(seed)
+    game_state = GameState()
+    for _ in range(rng.randint(1, MOVES)):
+        row, col, _ = rng.choice(game_state.get_sorted_moves()[:6])
+        game_state.make_move(row, col)
+
+    imported = GameState([row[:] for row in game_state.board], game_state.player)
+    assert imported.get_heuristic_value() == pytest.approx(game_state.get_heuristic_value())
+    # threat_pairs werden nur für freie und eigene Felder verglichen, siehe GameState.verify
+    assert game_state.verify()
+    assert imported.symmetric_hashes == game_state.symmetric_hashes
+    assert imported.active == game_state.active
+    assert list(imported.iter_moves()) == list(game_state.iter_moves())
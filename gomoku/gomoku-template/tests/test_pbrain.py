@@ -0,0 +1,71 @@
+import io
+
+import pytest
+
+from pbrain import PbrainProtocol
+
+"""
+Eine Sitzung im Piskvork-Protokoll mit den Antworten der Engine.
+"""
+
+
+@pytest.fixture
+def protocol():
+    protocol = PbrainProtocol(output=io.StringIO())
+    yield protocol
+    protocol.handle('END')
+
+
+def replies(protocol, *lines) -> list[str]:
+    output = protocol.output
+    start = output.tell()
+    for line in lines:
+        protocol.handle(line)
+    output.seek(start)
+    result = output.read().splitlines()
+    output.seek(0, io.SEEK_END)
+    return result
+
+
+def parse(reply: str) -> tuple[int, int]:
+    x, y = (int(part) for part in reply.split(','))
+    assert 0 <= x < 15 and 0 <= y < 15
+    return x, y
+
+
+def test_session(protocol):
+    assert replies(protocol, 'START 15') == ['OK']
+    assert replies(protocol, 'ABOUT') == ['name="gomoku-alpha-beta", version="1.0"']
+    assert replies(protocol, 'INFO timeout_turn 300', 'INFO time_left 60000') == []
+    assert protocol.timeout_turn == 300 and protocol.time_left == 60000
+
+    first = parse(*replies(protocol, 'BEGIN'))
+    assert protocol.board[first[1]][first[0]] == 1
+
+    second = parse(*replies(protocol, 'TURN 8,8'))
+    assert second not in (first, (8, 8))
+    assert protocol.board[8][8] == 2 and protocol.board[second[1]][second[0]] == 1
+
+    assert replies(protocol, f'TAKEBACK {second[0]},{second[1]}') == ['OK']
+    assert protocol.board[second[1]][second[0]] == 0
+
+    assert replies(protocol, 'RESTART') == ['OK']
+    assert not any(any(row) for row in protocol.board)
+
+
+def test_board_completes_five(protocol):
+    replies(protocol, 'START 15', 'INFO timeout_turn 300')
+    # Eigene offene Vier in Zeile 7, der Gegner hat nur verstreute Steine
+    board = ['7,7,1', '8,7,1', '9,7,1', '10,7,1', '2,2,2', '12,2,2', '2,12,2', '12,12,2']
+    reply = replies(protocol, 'BOARD', *board, 'DONE')
+    assert len(reply) == 1 and parse(reply[0]) in ((6, 7), (11, 7))
+
+
+def test_errors(protocol):
+    assert replies(protocol, 'START 20')[0].startswith('ERROR')
+    assert replies(protocol, 'START 15') == ['OK']
+    assert replies(protocol, 'TURN 15,3')[0].startswith('ERROR')
+    assert replies(protocol, 'TURN a,b')[0].startswith('ERROR')
+    assert replies(protocol, 'FOO') == ['UNKNOWN command FOO']
+    protocol.handle('END')
+    assert not protocol.running
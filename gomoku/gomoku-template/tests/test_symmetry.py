@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+from bitboard import INVERSE_SYMMETRIES, SYMMETRIES
+from game_state import GameState
+from zobrist import Zobrist
+
+"""
+Zobrist-Hashes und kanonische Schlüssel symmetrischer Stellungen, Rückabbildung der Züge aus dem Cache.
+"""
+
+GAMES = 10
+MOVES = 30
+
+
+def image(board, transform: int) -> list[list[int]]:
+    """
+    Bild der Stellung unter der Symmetrie transform.
+    """
+    result = [[0] * 15 for _ in range(15)]
+    for idx, target in enumerate(SYMMETRIES[transform]):
+        result[target // 15][target % 15] = board[idx // 15][idx % 15]
+    return result
+
+
+def random_game(seed: int):
+    rng = random.Random(seed)
+    game_state = GameState()
+    for _ in range(MOVES):
+        row, col, _ = rng.choice(game_state.get_sorted_moves()[:8])
+        game_state.make_move(row, col)
+        yield game_state
+
+
+def test_inverse_symmetries():
+    for transform in range(8):
+        inverse = SYMMETRIES[INVERSE_SYMMETRIES[transform]]
+        assert all(inverse[SYMMETRIES[transform][idx]] == idx for idx in range(225))
+
+
+@pytest.mark.parametrize('seed', range(GAMES))
+def test_symmetric_positions_share_canonical_key(seed):
+    zobrist = Zobrist()
+    for game_state in random_game(seed):
+        assert game_state.symmetric_hashes == zobrist.hash_board_symmetric(game_state.board, game_state.player)
+        key, transform = game_state.canonical_key()
+        for other in range(8):
+            board = image(game_state.board, other)
+            assert GameState(board, game_state.player).canonical_key()[0] == key
+            # Der Hash des Bildes ist der entsprechende symmetrische Hash der Stellung
+            assert zobrist.hash_board_symmetric(board, game_state.player)[0] == game_state.symmetric_hashes[other]
+        # Die kanonische Orientierung hat den kanonischen Hash als eigenen Hash
+        assert GameState(image(game_state.board, transform), game_state.player).zobrist_hash == key
+
+
+def test_side_to_move_changes_key():
+    board = GameState().board
+    board[7][7] = 1
+    assert GameState(board, 1).canonical_key()[0] != GameState(board, -1).canonical_key()[0]
+
+
+@pytest.mark.parametrize('seed', range(GAMES))
+def test_cached_moves_are_mapped_back(seed):
+    rng = random.Random(seed)
+    for game_state in random_game(seed):
+        expected = game_state.get_sorted_moves()
+        transform = rng.randrange(8)
+        board = image(game_state.board, transform)
+        # Der Cache stammt aus der Ausgangsstellung, die Züge müssen auf das Bild abgebildet werden
+        moves = GameState(board, game_state.player, cache=game_state.sorted_moves).get_sorted_moves()
+        mapping = SYMMETRIES[transform]
+        assert {(row, col): score for row, col, score in moves} == \
+               {(mapping[row * 15 + col] // 15, mapping[row * 15 + col] % 15): score for row, col, score in expected}
+        assert all(board[row][col] == 0 for row, col, _ in moves)
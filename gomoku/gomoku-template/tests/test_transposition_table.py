@@ -0,0 +1,71 @@
+import pytest
+
+from transposition_table import EXACT, LOWER_BOUND, UPPER_BOUND, TranspositionTable
+
+"""
+Speichern und Abrufen von Einträgen der Transpositionstabelle, Erkennen von Kollisionen und defekten Einträgen.
+"""
+
+KEY = 0x9E37_79B9_7F4A_7C15
+
+
+@pytest.fixture
+def table():
+    return TranspositionTable(0.01)
+
+
+def same_bucket(table, key: int, n: int) -> int:
+    """
+    Anderer Schlüssel, der denselben Bucket wie key adressiert.
+    """
+    return key ^ (n << table.buckets.bit_length())
+
+
+@pytest.mark.parametrize('flag', (EXACT, LOWER_BOUND, UPPER_BOUND))
+@pytest.mark.parametrize('move', (None, 0, 112, 224))
+def test_round_trip(table, flag, move):
+    table.store(KEY, 7, flag, -1234.5, move)
+    assert table.probe(KEY) == (-1234.5, 7, flag, move)
+
+
+def test_collision_is_rejected(table):
+    other = same_bucket(table, KEY, 1)
+    table.store(KEY, 3, EXACT, 10.0, 5)
+    assert table.probe(other) is None
+    assert table.collisions == 1
+    assert table.probe(KEY) == (10.0, 3, EXACT, 5)
+
+
+def test_bucket_keeps_deep_entry(table):
+    table.store(KEY, 6, EXACT, 1.0, 1)
+    # Schlüssel desselben Buckets mit geringerer Tiefe landen im immer ersetzten Slot
+    for n in (1, 2):
+        table.store(same_bucket(table, KEY, n), 2, LOWER_BOUND, float(n), n)
+    assert table.probe(KEY) == (1.0, 6, EXACT, 1)
+    assert table.probe(same_bucket(table, KEY, 1)) is None
+    assert table.probe(same_bucket(table, KEY, 2)) == (2.0, 2, LOWER_BOUND, 2)
+
+
+def test_entry_of_older_search_is_replaced(table):
+    table.store(KEY, 6, EXACT, 1.0, 1)
+    table.new_search()
+    assert table.probe(KEY) == (1.0, 6, EXACT, 1)
+    other = same_bucket(table, KEY, 1)
+    table.store(other, 2, UPPER_BOUND, 2.0, 2)
+    assert table.probe(other) == (2.0, 2, UPPER_BOUND, 2)
+    assert table.probe(KEY) is None
+
+
+def test_torn_entry_is_rejected(table):
+    table.store(KEY, 4, EXACT, 3.0, 9)
+    slot = (KEY & table.mask) * 2
+    # Ein anderer Prozess hat nur die Bewertung überschrieben (siehe Lazy-SMP)
+    table.scores[slot] = 4.0
+    assert table.probe(KEY) is None
+
+
+def test_clear(table):
+    table.store(KEY, 4, EXACT, 3.0, 9)
+    table.clear()
+    assert table.probe(KEY) is None
+    assert table.get_statistics()['hits'] == 0
@@ -0,0 +1,126 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from bitboard import CELL_LINES, CELLS, LINE_CELLS, LINE_COUNTS, SIZE
+from pattern_table import CODES, PAIR_MERGE, PAIR_VALUES, PAIRS, SIDE_WINDOWS, THREAT_ORDER, get_table
+
+"""
+In dieser Datei ist ein vektorisierter Scanner der Bedrohungen ganzer Bretter implementiert.
+
+Alle Funktionen arbeiten auf einem Batch von Brettern (N, 15, 15), ein einzelnes Brett wird als board[None] übergeben.
+Die Linien aller vier Richtungen (siehe bitboard.py) werden über einen Index in ein flaches Array mit einer
+zusätzlichen Randspalte gesammelt und auf jeder Seite um 5 Randfelder erweitert. Der Fenster-Index jedes Feldes
+(siehe pattern_table.py) ergibt sich aus einem Sliding-Window über die Ziffern der 11 Felder um jede Position und
+wird in der Lookup-Tabelle nachgeschlagen. Die Ergebnisse entsprechen damit genau Evaluator.evaluate bzw. GameState.threat_pairs.
+"""
+
+PAD = 5
+# Wert der Randspalte: weder leer noch ein Stein eines Spielers, also für beide blockiert
+BORDER = 2
+
+LINE_OFFSETS = tuple(sum(LINE_COUNTS[:d]) for d in range(4))
+LINES = sum(LINE_COUNTS)
+
+# GATHER[line, PAD + pos] = Feld-Index der Position pos der Linie, bzw. CELLS (Randspalte)
+GATHER = np.full((LINES, SIZE + 2 * PAD), CELLS, dtype=np.intp)
+for _d in range(4):
+    for _line, _cells in enumerate(LINE_CELLS[_d]):
+        for _pos, _idx in enumerate(_cells):
+            if _idx >= 0:
+                GATHER[LINE_OFFSETS[_d] + _line, PAD + _pos] = _idx
+
+# Linie und Position jedes Feldes in jeder Richtung, um die Ergebnisse auf (N, 225, 4) zurückzuführen
+CELL_LINE = np.array([[LINE_OFFSETS[d] + CELL_LINES[idx][d][0] for d in range(4)] for idx in range(CELLS)])
+CELL_POS = np.array([[CELL_LINES[idx][d][1] for d in range(4)] for idx in range(CELLS)])
+
+# DIGITS[player][value + 1] = Basis-3 Ziffer eines Feldes mit value (-1, 0, 1 oder BORDER) aus Sicht von player
+DIGITS = {1: np.array([2, 0, 1, 2], dtype=np.float32), -1: np.array([1, 0, 2, 2], dtype=np.float32)}
+# Gewichte der 11 Felder eines Fensters, das mittlere Feld ist das bewertete Feld selbst
+WINDOW_WEIGHTS = np.array([3 ** (PAD - 1 - i) * SIDE_WINDOWS for i in range(PAD)] + [0] + [3 ** i for i in range(PAD)],
+                          dtype=np.float32)
+
+MERGE = np.frombuffer(PAIR_MERGE, dtype=np.uint8).astype(np.intp)
+VALUES = np.array(PAIR_VALUES)
+FIVE = THREAT_ORDER.index(max(THREAT_ORDER, key=lambda t: t.value))
+
+_table = None
+
+
+def _lookup() -> np.ndarray:
+    global _table
+    if _table is None:
+        _table = np.frombuffer(get_table(), dtype=np.uint8)
+    return _table
+
+
+def gather_lines(boards) -> np.ndarray:
+    """
+    Gibt die um den Rand erweiterten Linien aller Richtungen als (N, 88, 25) Array zurück.
+    """
+    boards = np.asarray(boards, dtype=np.int8)
+    n = len(boards)
+    flat = np.concatenate([boards.reshape(n, CELLS), np.full((n, 1), BORDER, dtype=np.int8)], axis=1)
+    return flat[:, GATHER]
+
+
+def threat_pairs(boards, player: int, lines: np.ndarray = None) -> np.ndarray:
+    """
+    Paar-Codes der beiden stärksten Bedrohungen von player für jedes Feld und jede Richtung als (N, 225, 4) Array,
+    wie GameState.threat_pairs[player] (dort flach über idx * 4 + direction).
+    """
+    if lines is None:
+        lines = gather_lines(boards)
+    digits = DIGITS[player][lines + 1]
+    # Fenster-Index als Skalarprodukt der 11 verschobenen Felder mit ihren Gewichten (in float32 exakt)
+    index = (sliding_window_view(digits, 2 * PAD + 1, axis=2) @ WINDOW_WEIGHTS).astype(np.intp)
+    return _lookup()[index][:, CELL_LINE, CELL_POS].astype(np.intp)
+
+
+def cell_values(pairs: np.ndarray) -> np.ndarray:
+    """
+    Bewertung jedes Feldes aus den Paar-Codes (N, 225, 4), wie Evaluator.combine.
+    """
+    first = MERGE[pairs[:, :, 0] * PAIRS + pairs[:, :, 1]]
+    second = MERGE[pairs[:, :, 2] * PAIRS + pairs[:, :, 3]]
+    return VALUES[MERGE[first * PAIRS + second]]
+
+
+def heuristic_values(boards) -> np.ndarray:
+    """
+    Heuristik der Bretter wie GameState.get_heuristic_value: Summe der Bewertungen der schwarzen Steine
+    minus Summe der Bewertungen der weißen Steine.
+    """
+    boards = np.asarray(boards, dtype=np.int8)
+    lines = gather_lines(boards)
+    flat = boards.reshape(len(boards), CELLS)
+    black = np.where(flat == 1, cell_values(threat_pairs(boards, 1, lines)), 0).sum(axis=1)
+    white = np.where(flat == -1, cell_values(threat_pairs(boards, -1, lines)), 0).sum(axis=1)
+    return black - white
+
+
+def threat_counts(boards) -> np.ndarray:
+    """
+    Anzahl der Bedrohungen je Brett, Spieler (Index 0 Schwarz, 1 Weiß) und Threat-Code (siehe pattern_table.THREAT_ORDER)
+    als (N, 2, CODES) Array. Gezählt wird jede der beiden stärksten Bedrohungen eines eigenen Steines je Richtung,
+    eine offene Drei wird also von jedem ihrer drei Steine gezählt.
+    """
+    boards = np.asarray(boards, dtype=np.int8)
+    lines = gather_lines(boards)
+    flat = boards.reshape(len(boards), CELLS)
+    counts = np.zeros((len(boards), 2, CODES), dtype=np.int64)
+    for i, player in enumerate((1, -1)):
+        pairs = threat_pairs(boards, player, lines)
+        own = (flat == player)[:, :, None]
+        for codes in (pairs // CODES, pairs % CODES):
+            for code in range(1, CODES):
+                counts[:, i, code] += ((codes == code) & own).sum(axis=(1, 2))
+    return counts
+
+
+def find_fives(boards) -> np.ndarray:
+    """
+    Gibt für jedes Brett und jeden Spieler (Index 0 Schwarz, 1 Weiß) zurück, ob er mindestens fünf Steine in einer
+    Reihe hat, als (N, 2) Array.
+    """
+    lines = gather_lines(boards)
+    return np.stack([sliding_window_view(lines == player, 5, axis=2).all(axis=3).any(axis=(1, 2))
+                     for player in (1, -1)], axis=1)
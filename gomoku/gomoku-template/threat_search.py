@@ -0,0 +1,233 @@
+import time
+from cache import BoundedCache
+from constants import Threats
+from pattern_table import CODES, PAIRS, THREAT_CODES
+from bitboard import INVERSE_SYMMETRIES, SYMMETRIES, iter_bits
+
+"""
+In dieser Datei ist die Threat-Space Suche (VCF und VCT) implementiert.
+
+Der Angreifer spielt nur Züge, die eine Vier (VCF, victory by continuous fours) bzw. eine Vier oder offene Drei
+(VCT, victory by continuous threats) erzeugen, der Verteidiger nur die erzwungenen Antworten:
+    - auf eine Vier das Feld, auf dem der Angreifer fünf hätte,
+    - auf eine Drei die Felder, auf denen der Angreifer eine Vier erhielte, und eigene Vieren.
+Hat der Verteidiger selbst eine Vier, muss der Angreifer sie blockieren und kann nur weitermachen, wenn der
+Blockzug selbst eine Drohung ist.
+
+Die Drohungen werden aus GameState.threat_pairs gelesen: für ein freies Feld beschreiben die Paar-Codes die
+Bedrohungen, die ein Stein des Spielers dort erzeugen würde. Alle Drohfelder liegen im Abstand von höchstens
+zwei Feldern zu einem eigenen Stein, es genügt also, die aktiven Felder zu betrachten.
+
+Die Suche hat ein eigenes Budget aus Knoten und Zeit. Wird es überschritten, gilt die Stellung als nicht gelöst.
+"""
+
+DEFAULT_MAX_NODES = 5000
+DEFAULT_TIME_LIMIT = 0.5
+# Maximale Anzahl Angriffszüge
+VCF_DEPTH = 12
+VCT_DEPTH = 6
+
+NONE, THREE, FOUR, OPEN_FOUR, FIVE = range(5)
+
+_LEVELS = {Threats.FIVE: FIVE, Threats.OPEN_FOUR: OPEN_FOUR, Threats.BLOCKED_FOUR: FOUR, Threats.OPEN_POKED_FOUR: FOUR,
+           Threats.BLOCKED_POKED_FOUR: FOUR, Threats.OPEN_THREE: THREE, Threats.OPEN_POKED_THREE: THREE}
+_CODE_LEVELS = [0] * CODES
+for _threat, _level in _LEVELS.items():
+    _CODE_LEVELS[THREAT_CODES[_threat]] = _level
+# PAIR_FLAGS[pair] = Drohungen eines Paar-Codes als Bitmaske 1 << Stufe (ohne NONE), das höchste Bit ist die stärkste
+PAIR_FLAGS = tuple((1 << _CODE_LEVELS[pair // CODES] | 1 << _CODE_LEVELS[pair % CODES]) & ~1 for pair in range(PAIRS))
+
+
+class BudgetExceeded(Exception):
+    pass
+
+
+class ThreatSearch:
+
+    def __init__(self, game_state, max_nodes: int = DEFAULT_MAX_NODES, time_limit: float = DEFAULT_TIME_LIMIT,
+                 stop_event=None) -> None:
+        self.game_state = game_state
+        # Budget je Aufruf von vcf bzw. vct
+        self.max_nodes = max_nodes
+        self.time_limit = time_limit
+        # Optionales Stoppsignal der Engine
+        self.stop_event = stop_event
+        # Stellungen (kanonischer Hash, VCT), die mit der gespeicherten Tiefe nicht gewonnen werden konnten.
+        # Beide Caches bleiben über mehrere Aufrufe erhalten, z.B. an den Blättern einer Alpha-Beta Suche.
+        self.failed = BoundedCache()
+        # Drohfelder beider Spieler je Stellung (kanonischer Hash, Felder in kanonischer Orientierung), siehe threats
+        self.threat_cache = BoundedCache()
+
+        # Statistiken
+        self.nodes = 0
+        self.elapsed = 0.0
+        self.aborted = False
+        self.deadline = 0.0
+        self.node_limit = 0
+
+    def search(self, player: int, vct: bool = True):
+        """
+        Sucht einen erzwungenen Gewinn für player (am Zug), zuerst per VCF, dann per VCT.
+        Gibt die Gewinnfolge als Liste von Zügen (row, col) abwechselnd für Angreifer und Verteidiger zurück,
+        bei VCT gegen die jeweils erste Verteidigung. Gibt None zurück, wenn keine gefunden wurde.
+        """
+        line = self.vcf(player)
+        if line is None and vct and not self.aborted:
+            line = self.vct(player)
+        return line
+
+    def vcf(self, player: int, max_depth: int = VCF_DEPTH):
+        return self.run(player, max_depth, False)
+
+    def vct(self, player: int, max_depth: int = VCT_DEPTH):
+        return self.run(player, max_depth, True)
+
+    def run(self, player: int, max_depth: int, threes: bool):
+        """
+        Iterative Vertiefung über die Anzahl Angriffszüge, damit die kürzeste Gewinnfolge gefunden wird.
+        """
+        start = time.perf_counter()
+        self.deadline = start + self.time_limit
+        self.node_limit = self.nodes + self.max_nodes
+        self.aborted = False
+        moves = len(self.game_state.move_history)
+        try:
+            for depth in range(1, max_depth + 1):
+                line = self.attack(player, depth, threes)
+                if line is not None:
+                    return line
+            return None
+        except BudgetExceeded:
+            self.aborted = True
+            while len(self.game_state.move_history) > moves:
+                self.game_state.undo_move()
+            return None
+        finally:
+            self.elapsed += time.perf_counter() - start
+
+    def threats(self) -> dict:
+        """
+        Gibt für beide Spieler die aktiven Felder mit einer Drohung als Liste von (Stufe, Feld-Index) zurück,
+        absteigend nach Stufe und Bewertung des Feldes.
+        """
+        game_state = self.game_state
+        key, transform = game_state.canonical_key()
+        cached = self.threat_cache.get(key)
+        if cached is not None:
+            if transform == 0:
+                return cached
+            inverse = SYMMETRIES[INVERSE_SYMMETRIES[transform]]
+            return {player: [(level, inverse[idx]) for level, idx in found] for player, found in cached.items()}
+
+        active = list(iter_bits(game_state.active))
+        threats = {}
+        for player in (1, -1):
+            pairs = game_state.threat_pairs[player]
+            found = []
+            for idx in active:
+                slot = 4 * idx
+                flags = PAIR_FLAGS[pairs[slot]] | PAIR_FLAGS[pairs[slot + 1]] | PAIR_FLAGS[pairs[slot + 2]] | PAIR_FLAGS[pairs[slot + 3]]
+                if flags:
+                    found.append((flags.bit_length() - 1, game_state.evaluate_cell(idx, player), idx))
+            found.sort(reverse=True)
+            threats[player] = [(level, idx) for level, _, idx in found]
+        mapping = SYMMETRIES[transform]
+        self.threat_cache.put(key, threats if transform == 0 else
+                              {player: [(level, mapping[idx]) for level, idx in found] for player, found in threats.items()})
+        return threats
+
+    def squares(self, player: int, level: int) -> list:
+        """
+        Aktive Felder, auf denen ein Stein von player mindestens eine Drohung der Stufe level erzeugt.
+        """
+        return [idx for threat, idx in self.threats()[player] if threat >= level]
+
+    def count_node(self) -> None:
+        self.nodes += 1
+        if self.nodes >= self.node_limit:
+            raise BudgetExceeded()
+        if self.nodes & 63 == 0 and (time.perf_counter() > self.deadline
+                                     or self.stop_event is not None and self.stop_event.is_set()):
+            raise BudgetExceeded()
+
+    def attack(self, attacker: int, depth: int, threes: bool):
+        """
+        attacker ist am Zug. Gibt die Gewinnfolge oder None zurück.
+        """
+        self.count_node()
+        game_state = self.game_state
+        fives = self.squares(attacker, FIVE)
+        if fives:
+            return [divmod(fives[0], 15)]
+        if depth == 0:
+            return None
+        key = (game_state.canonical_key()[0], threes)
+        if self.failed.get(key, -1) >= depth:
+            return None
+
+        blocks = self.squares(-attacker, FIVE)
+        candidates = self.squares(attacker, THREE if threes else FOUR)
+        if len(blocks) > 1:
+            candidates = []
+        elif blocks:
+            candidates = [idx for idx in candidates if idx == blocks[0]]
+
+        for idx in candidates:
+            row, col = divmod(idx, 15)
+            game_state.make_move(row, col)
+            line = self.defend(attacker, depth, threes)
+            game_state.undo_move()
+            if line is not None:
+                return [(row, col)] + line
+
+        self.failed.put(key, depth)
+        return None
+
+    def defend(self, attacker: int, depth: int, threes: bool):
+        """
+        Der Verteidiger ist nach einem Angriffszug am Zug. Gibt die Gewinnfolge gegen die erste Verteidigung zurück,
+        wenn der Angreifer gegen jede Verteidigung gewinnt, sonst None.
+        """
+        game_state = self.game_state
+        defender = -attacker
+        if self.squares(defender, FIVE):
+            return None
+        fives = self.squares(attacker, FIVE)
+        if len(fives) > 1:
+            return [divmod(fives[0], 15), divmod(fives[1], 15)]
+        if fives:
+            replies = fives
+        elif threes and self.squares(attacker, OPEN_FOUR):
+            replies = self.squares(attacker, FOUR)
+            replies += [idx for idx in self.squares(defender, FOUR) if idx not in replies]
+        else:
+            return None
+
+        line = None
+        for idx in replies:
+            row, col = divmod(idx, 15)
+            game_state.make_move(row, col)
+            continuation = self.attack(attacker, depth - 1, threes)
+            game_state.undo_move()
+            if continuation is None:
+                return None
+            if line is None:
+                line = [(row, col)] + continuation
+        return line
+
+
+def find_forced_win(game_state, player: int, max_nodes: int = DEFAULT_MAX_NODES,
+                    time_limit: float = DEFAULT_TIME_LIMIT, stop_event=None, vct: bool = True):
+    """
+    Sucht an der Wurzel einer Engine nach einem erzwungenen Gewinn für player und gibt die Gewinnfolge
+    (oder None) zurück. Das Ergebnis wird mit den Statistiken der Suche ausgegeben.
+    Hat player kein Feld für einen ersten Angriffszug (Vier bzw. bei VCT auch Drei), wird nicht gesucht.
+    """
+    solver = ThreatSearch(game_state, max_nodes, time_limit, stop_event)
+    if not solver.squares(player, THREE if vct else FOUR):
+        print('threat search: no threat candidates')
+        return None
+    line = solver.search(player, vct)
+    print(f'threat search: {"win " + str(line) if line else "no forced win"}, nodes: {solver.nodes}, '
+          f'time: {solver.elapsed:.3f}{", aborted" if solver.aborted else ""}')
+    return line
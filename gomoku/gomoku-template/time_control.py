@@ -0,0 +1,126 @@
+import threading
+import time
+
+"""
+In dieser Datei ist die Zeitkontrolle der Engines implementiert.
+
+TimeControl beschreibt die Bedenkzeit: feste Zeit je Zug (move_time), Restzeit der Partie (total_time) und
+Zeitgewinn je Zug (increment), beliebig kombinierbar. Für jeden Zug wird daraus ein Ziel (target) und eine harte
+Grenze (maximum) bestimmt. MoveTimer überwacht einen Zug:
+    - bei maximum setzt ein Timer das Stoppsignal der Engine, die laufende Suche bricht ab,
+    - Alpha-Beta beginnt keine weitere Tiefe, wenn sie nach dem Verzweigungsfaktor der letzten Iterationen
+      nicht bis target fertig würde, nach einem erzwungenen Gewinn oder wenn der beste Zug stabil ist,
+    - MCTS hört bei target auf oder sobald der meistbesuchte Zug bis target nicht mehr überholt werden kann.
+"""
+
+# Sicherheitsabstand zur Zeitgrenze (Ausgabe des Zuges, Thread-Wechsel)
+DEFAULT_MARGIN = 0.05
+# Geschätzte Anzahl eigener Züge einer Partie und Untergrenze der noch verbleibenden Züge
+EXPECTED_MOVES = 40
+MIN_MOVES_LEFT = 10
+# Höchstens dieser Anteil der Restzeit wird für einen Zug verwendet
+MAX_FRACTION = 0.25
+# Verzweigungsfaktor, solange es noch keine zwei Iterationen gibt
+DEFAULT_BRANCHING = 5.0
+# Ist der beste Zug seit so vielen Tiefen gleich und die Hälfte von target verbraucht, wird nicht weiter gesucht
+STABLE_DEPTHS = 4
+STABLE_FRACTION = 0.5
+# Höchstens dieser Anteil von target geht an die Threat-Space Suche an der Wurzel
+THREAT_FRACTION = 0.25
+
+
+class TimeControl:
+
+    def __init__(self, move_time: float = None, total_time: float = None, increment: float = 0.0,
+                 margin: float = DEFAULT_MARGIN) -> None:
+        self.move_time = move_time
+        self.total_time = total_time
+        self.increment = increment
+        self.margin = margin
+
+    def allocate(self, stones: int) -> tuple[float, float]:
+        """
+        Gibt (target, maximum) in Sekunden für einen Zug bei stones Steinen auf dem Brett zurück.
+        """
+        target = maximum = float('inf')
+        if self.total_time is not None:
+            moves_left = max(MIN_MOVES_LEFT, EXPECTED_MOVES - stones // 2)
+            target = self.total_time / moves_left + self.increment
+            maximum = min(self.total_time * MAX_FRACTION + self.increment, 3 * target)
+        if self.move_time is not None:
+            maximum = min(maximum, self.move_time)
+            target = min(target, maximum)
+        maximum = max(0.0, maximum - self.margin)
+        return min(target, maximum), maximum
+
+    def consume(self, elapsed: float) -> None:
+        """
+        Bucht die für einen Zug verbrauchte Zeit von der Restzeit ab.
+        """
+        if self.total_time is not None:
+            self.total_time = max(0.0, self.total_time - elapsed) + self.increment
+
+
+class MoveTimer:
+
+    def __init__(self, time_control: TimeControl, stones: int, stop_event) -> None:
+        self.time_control = time_control
+        self.target, self.maximum = time_control.allocate(stones)
+        self.start = time.perf_counter()
+        # Beginn der eigentlichen Suche (siehe begin)
+        self.search_start = self.start
+        self.last_iteration = self.start
+        self.iteration_times = []
+        self.moves = []
+        # Harte Grenze: das Stoppsignal beendet die Suche wie ein Abbruch aus der GUI
+        self.timer = threading.Timer(self.maximum, stop_event.set)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def threat_time(self, limit: float) -> float:
+        return min(limit, THREAT_FRACTION * self.target)
+
+    def begin(self) -> None:
+        """
+        Markiert den Beginn der eigentlichen Suche nach der Threat-Space Suche. Iterationszeiten und
+        Simulationsrate werden ab hier gemessen.
+        """
+        self.search_start = self.last_iteration = time.perf_counter()
+
+    def finish(self) -> None:
+        self.timer.cancel()
+        self.time_control.consume(self.elapsed())
+
+    def next_iteration(self, move, won: bool) -> bool:
+        """
+        Wird nach jeder vollständig durchsuchten Tiefe aufgerufen. Gibt zurück, ob die nächste Tiefe begonnen werden soll.
+        """
+        now = time.perf_counter()
+        self.iteration_times.append(now - self.last_iteration)
+        self.last_iteration = now
+        self.moves.append(move)
+        elapsed = now - self.start
+        if won:
+            return False
+        if (len(self.moves) >= STABLE_DEPTHS and len(set(self.moves[-STABLE_DEPTHS:])) == 1
+                and elapsed >= STABLE_FRACTION * self.target):
+            return False
+        times = self.iteration_times
+        branching = times[-1] / times[-2] if len(times) >= 2 and times[-2] > 0 else DEFAULT_BRANCHING
+        return elapsed + times[-1] * max(branching, 1.0) <= self.target
+
+    def keep_simulating(self, simulations: int, best_visits: int, second_visits: int) -> bool:
+        """
+        Gibt für MCTS zurück, ob weiter simuliert werden soll.
+        """
+        now = time.perf_counter()
+        elapsed, searched = now - self.start, now - self.search_start
+        if elapsed >= self.target:
+            return False
+        if searched <= 0 or simulations == 0:
+            return True
+        remaining = (self.target - elapsed) * simulations / searched
+        return best_visits - second_visits <= remaining
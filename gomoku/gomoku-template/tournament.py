@@ -0,0 +1,248 @@
+import argparse
+import contextlib
+import json
+import math
+import multiprocessing
+import os
+import time
+import numpy as np
+from alpha_beta_engine import AlphaBetaEngine
+from constants import Piece
+from mcts import MonteCarloEngine
+from rules import is_full, winning_line
+from time_control import TimeControl
+from benchmarks.corpus import POSITIONS, position
+
+"""
+In dieser Datei ist ein Turnier zwischen Engine-Konfigurationen implementiert.
+
+Jede Konfiguration ist eine Spezifikation "engine:key=value,...", z.B.
+    alpha-beta:depth=4
+    alpha-beta:move_time=0.5,threat_nodes=0
+    mcts:iterations=800,batch_size=16
+Die Schlüssel depth, iterations, move_time, total_time und increment steuern die Suche je Zug, alle übrigen werden
+an den Konstruktor der Engine übergeben.
+
+Jedes Paar von Konfigurationen spielt jede Eröffnung zweimal mit vertauschten Farben. Die Partien laufen parallel
+in einem Prozess-Pool, jeder Prozess verwendet seine Engines für alle seine Partien. Jede beendete Partie wird
+sofort als JSON-Zeile in die Ausgabedatei geschrieben. Am Ende werden je Paar Ergebnis und Elo-Differenz mit
+95%-Konfidenzintervall sowie je Konfiguration Knoten bzw. Simulationen pro Sekunde und die Latenz je Zug ausgegeben.
+
+    python tournament.py alpha-beta:depth=3 mcts:iterations=500 --processes 4 --output games.jsonl
+"""
+
+ENGINES = {'alpha-beta': AlphaBetaEngine, 'mcts': MonteCarloEngine}
+SEARCH_KEYS = ('depth', 'iterations', 'move_time', 'total_time', 'increment')
+DEFAULT_OPENINGS = POSITIONS['opening']
+# z-Wert des 95%-Konfidenzintervalls
+Z_95 = 1.96
+
+# Engines des Worker-Prozesses je (Spezifikation, Farbe)
+_engines = {}
+
+
+def parse_spec(spec: str) -> tuple[str, dict, dict]:
+    """
+    Zerlegt eine Spezifikation in (Engine, Suchparameter, Konstruktor-Parameter).
+    """
+    kind, _, options = spec.partition(':')
+    if kind not in ENGINES:
+        raise ValueError(f'unknown engine {kind!r}, expected one of {list(ENGINES)}')
+    search, constructor = {}, {}
+    for option in filter(None, options.split(',')):
+        key, _, value = option.partition('=')
+        value = float(value) if '.' in value else int(value)
+        (search if key in SEARCH_KEYS else constructor)[key] = value
+    return kind, search, constructor
+
+
+def get_engine(spec: str, player: int):
+    key = (spec, player)
+    if key not in _engines:
+        kind, _, constructor = parse_spec(spec)
+        _engines[key] = ENGINES[kind](**constructor)
+    return _engines[key]
+
+
+def clock(search: dict):
+    """
+    Bedenkzeit einer Seite für eine ganze Partie oder None. Dasselbe Objekt wird für alle Züge der Seite verwendet,
+    damit die Restzeit abnimmt und das Increment gutgeschrieben wird.
+    """
+    if 'move_time' in search or 'total_time' in search:
+        return TimeControl(search.get('move_time'), search.get('total_time'), search.get('increment', 0.0))
+    return None
+
+
+def think(engine, kind: str, search: dict, board, player: int, time_control=None):
+    """
+    Lässt engine für die Stellung rechnen und gibt (Zug, Knoten bzw. Simulationen) zurück.
+    """
+    arguments = {}
+    if time_control is not None:
+        arguments['time_control'] = time_control
+    if kind == 'alpha-beta' and 'depth' in search:
+        arguments['max_depth'] = search['depth']
+    if kind == 'mcts' and 'iterations' in search:
+        arguments['iterations'] = search['iterations']
+
+    engine.start_evaluation([row[:] for row in board], player, **arguments)
+    if engine.evaluation_thread is not None:
+        engine.evaluation_thread.join()
+    move = engine.get_results()
+    work = engine.nodes if kind == 'alpha-beta' else engine.simulations
+    engine.stop_evaluation()
+    return move, work
+
+
+def play_game(task: dict) -> dict:
+    """
+    Spielt eine Partie im Worker-Prozess. Das Ergebnis ist aus Sicht von Schwarz (1, 0.5 oder 0).
+    """
+    board, player = position(task['moves'])
+    specs = {Piece.BLACK.value: task['black'], Piece.WHITE.value: task['white']}
+    moves = [list(move) for move in task['moves']]
+    latency = {Piece.BLACK.value: [], Piece.WHITE.value: []}
+    work = {Piece.BLACK.value: 0, Piece.WHITE.value: 0}
+    result, reason = 0.5, 'move limit'
+    clocks = {color: clock(parse_spec(spec)[1]) for color, spec in specs.items()}
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        while len(moves) < task['max_moves']:
+            kind, search, _ = parse_spec(specs[player])
+            start = time.perf_counter()
+            (row, col), nodes = think(get_engine(specs[player], player), kind, search, board, player,
+                                      clocks[player])
+            latency[player].append(time.perf_counter() - start)
+            work[player] += nodes
+
+            if not (0 <= row < 15 and 0 <= col < 15) or board[row][col] != 0:
+                result, reason = (0.0 if player == Piece.BLACK.value else 1.0), f'illegal move {(row, col)}'
+                break
+            board[row][col] = player
+            moves.append([row, col])
+            if winning_line(board, row, col, player) is not None:
+                result, reason = (1.0 if player == Piece.BLACK.value else 0.0), 'five'
+                break
+            if is_full(board):
+                result, reason = 0.5, 'board full'
+                break
+            player = -player
+
+    return {
+        'game': task['game'],
+        'opening': task['opening'],
+        'black': task['black'],
+        'white': task['white'],
+        'result': result,
+        'reason': reason,
+        'moves': moves,
+        'latency': {'black': latency[Piece.BLACK.value], 'white': latency[Piece.WHITE.value]},
+        'work': {'black': work[Piece.BLACK.value], 'white': work[Piece.WHITE.value]},
+    }
+
+
+def schedule(specs: list, openings: dict, rounds: int, max_moves: int) -> list:
+    tasks = []
+    for _ in range(rounds):
+        for i, first in enumerate(specs):
+            for second in specs[i + 1:]:
+                for name, moves in openings.items():
+                    for black, white in ((first, second), (second, first)):
+                        tasks.append({'game': len(tasks), 'opening': name, 'moves': moves, 'black': black,
+                                      'white': white, 'max_moves': max_moves})
+    return tasks
+
+
+def run(specs: list, openings: dict = None, rounds: int = 1, processes: int = None, output: str = None,
+        max_moves: int = 225):
+    """
+    Spielt das Turnier und liefert die Partien in der Reihenfolge ihres Endes. Mit output werden sie zusätzlich
+    als JSON-Zeilen in die Datei geschrieben.
+    """
+    for spec in specs:
+        parse_spec(spec)
+    tasks = schedule(specs, DEFAULT_OPENINGS if openings is None else openings, rounds, max_moves)
+    context = multiprocessing.get_context('spawn')
+    with contextlib.ExitStack() as stack:
+        records = stack.enter_context(open(output, 'w')) if output else None
+        pool = stack.enter_context(context.Pool(processes or os.cpu_count()))
+        for record in pool.imap_unordered(play_game, tasks):
+            if records is not None:
+                records.write(json.dumps(record) + '\n')
+                records.flush()
+            yield record
+
+
+def elo(score: float) -> float:
+    """
+    Elo-Differenz zu einem erwarteten Ergebnis score, bei 0 bzw. 1 unendlich.
+    """
+    if score <= 0:
+        return -math.inf
+    if score >= 1:
+        return math.inf
+    return -400 * math.log10(1 / score - 1)
+
+
+def elo_estimate(scores: list) -> tuple[float, float, float]:
+    """
+    Elo-Differenz aus den Ergebnissen (1, 0.5, 0) einer Seite mit 95%-Konfidenzintervall (untere, obere Grenze).
+    Hat eine Seite alle Partien gewonnen, ist die Differenz unendlich und nur die untere Grenze aussagekräftig.
+    """
+    n = len(scores)
+    mean = sum(scores) / n
+    deviation = math.sqrt(sum((s - mean) ** 2 for s in scores) / n / n)
+    if deviation == 0:
+        # Ohne Streuung (z.B. nur Siege) wird die Streuung von Partien zwischen gleich starken Gegnern angenommen
+        deviation = 0.5 / math.sqrt(n)
+    return elo(mean), elo(mean - Z_95 * deviation), elo(mean + Z_95 * deviation)
+
+
+def report(specs: list, records: list) -> str:
+    lines = []
+    for i, first in enumerate(specs):
+        for second in specs[i + 1:]:
+            scores = [record['result'] if record['black'] == first else 1 - record['result']
+                      for record in records if {record['black'], record['white']} == {first, second}]
+            if not scores:
+                continue
+            wins, draws = scores.count(1.0), scores.count(0.5)
+            diff, low, high = elo_estimate(scores)
+            lines.append(f'{first} vs {second}: +{wins} ={draws} -{len(scores) - wins - draws}, '
+                         f'score {sum(scores) / len(scores):.1%}, Elo {diff:+.0f} [{low:+.0f}, {high:+.0f}]')
+
+    for spec in specs:
+        latency, work = [], 0
+        for record in records:
+            for color in ('black', 'white'):
+                if record[color] == spec:
+                    latency += record['latency'][color]
+                    work += record['work'][color]
+        if not latency:
+            continue
+        p50, p90, p99 = np.percentile(latency, [50, 90, 99])
+        unit = 'nodes' if spec.startswith('alpha-beta') else 'simulations'
+        lines.append(f'{spec}: {work / sum(latency):.0f} {unit}/sec, moves: {len(latency)}, latency p50 {p50:.3f}s, '
+                     f'p90 {p90:.3f}s, p99 {p99:.3f}s, max {max(latency):.3f}s')
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Turnier zwischen Engine-Konfigurationen.')
+    parser.add_argument('engines', nargs='+', help='Spezifikationen "engine:key=value,..."')
+    parser.add_argument('--rounds', type=int, default=1, help='Wiederholungen aller Eröffnungen')
+    parser.add_argument('--processes', type=int, default=None, help='Größe des Prozess-Pools')
+    parser.add_argument('--output', default='tournament.jsonl', help='Partien als JSON-Zeilen')
+    parser.add_argument('--max-moves', type=int, default=225, help='Remis nach so vielen Steinen')
+    args = parser.parse_args()
+    if len(set(args.engines)) < 2:
+        parser.error('at least two different engine configurations are required')
+
+    played = []
+    for game in run(args.engines, rounds=args.rounds, processes=args.processes, output=args.output,
+                    max_moves=args.max_moves):
+        played.append(game)
+        print(f'game {game["game"]}: {game["black"]} - {game["white"]} ({game["opening"]}): '
+              f'{game["result"]} ({game["reason"]}, {len(game["moves"])} stones)')
+    print(report(args.engines, played))
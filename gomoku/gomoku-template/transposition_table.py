@@ -0,0 +1,143 @@
+"""
+In dieser Datei ist die Transpositionstabelle der Alpha-Beta Suche implementiert.
+
+Die Tabelle hat eine feste Größe (Speicherbudget in MB) und liegt in einem einzigen vorab allokierten Puffer.
+Ein Bucket besteht aus zwei Einträgen: Slot 0 wird nur durch eine mindestens gleich tiefe Suche
+(oder wenn er aus einer früheren Suche stammt) ersetzt, Slot 1 wird immer ersetzt.
+Der Bucket wird über die niederwertigen Bits des Zobrist-Hashes adressiert, der volle Hash wird zur
+Verifikation mitgespeichert.
+
+Jeder Eintrag besteht aus drei 64-Bit Werten in getrennten Spalten des Puffers:
+    key:   Zobrist-Hash XOR data XOR Bits von score
+    score: Bewertung (double)
+    data:  depth + 1 (Bits 0-7, 0 = leer) | flag (Bits 8-9) | move + 1 (Bits 10-17, 0 = kein Zug) | Generation (Bits 18-25)
+
+move ist der Feld-Index row * 15 + col, depth die verbleibende Suchtiefe des Eintrags.
+
+Da der gespeicherte Schlüssel mit data und score verknüpft ist, wird ein Eintrag, den mehrere Prozesse
+gleichzeitig schreiben (siehe Lazy-SMP in alpha_beta_engine.py), beim Lesen als ungültig erkannt.
+Der Puffer kann deshalb ohne Locks in multiprocessing.shared_memory liegen.
+"""
+
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+ENTRY_BYTES = 24
+BUCKET_SIZE = 2
+MASK64 = (1 << 64) - 1
+
+
+def table_size(size_mb: float) -> tuple[int, int]:
+    """
+    Gibt die Anzahl Buckets (Zweierpotenz) und die Puffergröße in Bytes für das Speicherbudget size_mb zurück.
+    """
+    buckets = 1
+    while 2 * buckets * BUCKET_SIZE * ENTRY_BYTES <= size_mb * 2**20:
+        buckets *= 2
+    return buckets, buckets * BUCKET_SIZE * ENTRY_BYTES
+
+
+class TranspositionTable:
+
+    def __init__(self, size_mb: float = 64, buffer=None) -> None:
+        self.buckets, self.size = table_size(size_mb)
+        size = self.size
+        self.mask = self.buckets - 1
+
+        entries = self.buckets * BUCKET_SIZE
+        self.buffer = bytearray(size) if buffer is None else buffer
+        view = memoryview(self.buffer)[:size]
+        self.keys = view[0:8 * entries].cast('Q')
+        self.scores = view[8 * entries:16 * entries].cast('d')
+        self.score_bits = view[8 * entries:16 * entries].cast('Q')
+        self.data_bytes = view[16 * entries:24 * entries]
+        self.data = self.data_bytes.cast('Q')
+
+        # Generation der aktuellen Suche, ältere Einträge werden bevorzugt ersetzt
+        self.generation = 0
+
+        # Statistiken
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.overwrites = 0
+
+    def clear(self) -> None:
+        """
+        Leert die Tabelle und setzt die Statistiken zurück.
+        """
+        self.data_bytes[:] = bytes(len(self.data_bytes))
+        self.generation = 0
+        self.reset_statistics()
+
+    def new_search(self) -> None:
+        """
+        Beginnt eine neue Suche, ohne die Tabelle zu leeren. Einträge älterer Suchen bleiben abrufbar,
+        werden aber bei Bedarf unabhängig von ihrer Tiefe ersetzt. Die Statistiken gelten ab hier für die neue Suche.
+        """
+        self.generation = (self.generation + 1) & 0xFF
+        self.reset_statistics()
+
+    def release(self) -> None:
+        """
+        Gibt die Sichten auf den Puffer frei, damit ein Shared-Memory Puffer geschlossen werden kann.
+        """
+        for view in (self.keys, self.scores, self.score_bits, self.data, self.data_bytes):
+            view.release()
+
+    def reset_statistics(self) -> None:
+        self.hits, self.misses, self.collisions, self.overwrites = 0, 0, 0, 0
+
+    def probe(self, key: int):
+        """
+        Sucht den Eintrag zum Hash key. Gibt (score, depth, flag, move) oder None zurück.
+        """
+        key = int(key) & MASK64
+        base = (key & self.mask) * BUCKET_SIZE
+        for slot in range(base, base + BUCKET_SIZE):
+            data = self.data[slot]
+            if data and self.keys[slot] ^ data ^ self.score_bits[slot] == key:
+                self.hits += 1
+                move = (data >> 10) & 0xFF
+                return self.scores[slot], (data & 0xFF) - 1, (data >> 8) & 3, move - 1 if move else None
+        if self.data[base] or self.data[base + 1]:
+            self.collisions += 1
+        self.misses += 1
+        return None
+
+    def store(self, key: int, depth: int, flag: int, score: float, move: int = None) -> None:
+        """
+        Speichert das Ergebnis einer Suche der verbleibenden Tiefe depth.
+        """
+        key = int(key) & MASK64
+        base = (key & self.mask) * BUCKET_SIZE
+        data = (depth + 1) | flag << 8 | (0 if move is None else move + 1) << 10 | self.generation << 18
+
+        preferred = self.data[base]
+        if (preferred and self.stored_key(base) != key and (preferred & 0xFF) - 1 > depth
+                and (preferred >> 18) & 0xFF == self.generation):
+            slot = base + 1
+        else:
+            slot = base
+
+        if self.data[slot] and self.stored_key(slot) != key:
+            self.overwrites += 1
+        self.scores[slot] = score
+        self.data[slot] = data
+        self.keys[slot] = key ^ data ^ self.score_bits[slot]
+
+    def stored_key(self, slot: int) -> int:
+        return self.keys[slot] ^ self.data[slot] ^ self.score_bits[slot]
+
+    def get_statistics(self) -> dict:
+        probes = self.hits + self.misses
+        return {
+            'size_bytes': self.size,
+            'entries': self.buckets * BUCKET_SIZE,
+            'hits': self.hits,
+            'misses': self.misses,
+            'collisions': self.collisions,
+            'overwrites': self.overwrites,
+            'hit_rate': self.hits / probes if probes else 0.0,
+        }
@@ -1,22 +1,103 @@
 import random
-import numpy as np
+from bitboard import SYMMETRIES
 from constants import Piece
 
+"""
+Die Zobrist-Schlüssel sind prozessweit einmalig und deterministisch aus DEFAULT_SEED erzeugt.
+Damit sind Hash-Werte verschiedener Engine-Instanzen, Prozesse und Programmstarts vergleichbar und
+können z.B. in gemeinsamen oder persistenten Tabellen verwendet werden.
+
+Die Schlüssel sind 64-Bit Python-Ints. Zusätzlich gibt es einen Schlüssel für den Spieler am Zug,
+der genau dann im Hash enthalten ist, wenn Weiß am Zug ist.
+
+Neben dem Hash der Stellung selbst können die Hashes ihrer 8 symmetrischen Bilder (siehe bitboard.SYMMETRIES)
+inkrementell geführt werden. Der kleinste davon ist der kanonische Hash, den alle symmetrischen Stellungen teilen.
+"""
+
+DEFAULT_SEED = 0x5EED_60B0
+
+# Schlüssel je Feld-Index row * 15 + col
+BLACK_KEYS: list[int] = []
+WHITE_KEYS: list[int] = []
+# SIDE_KEY[0] ist der Schlüssel für "Weiß am Zug"
+SIDE_KEY: list[int] = []
+# Schlüssel eines Zuges: Stein des Spielers und Wechsel des Spielers am Zug
+MOVE_KEYS: dict[int, list[int]] = {Piece.BLACK.value: [], Piece.WHITE.value: []}
+# SYMMETRIC_MOVE_KEYS[player][idx][transform] = Schlüssel des Zuges im Bild unter der Symmetrie transform
+SYMMETRIC_MOVE_KEYS: dict[int, list[tuple]] = {Piece.BLACK.value: [], Piece.WHITE.value: []}
+
+
+def seed(value: int = DEFAULT_SEED) -> None:
+    """
+    Erzeugt die Schlüssel neu aus value. Die Listen werden in-place ersetzt, damit bestehende
+    Referenzen gültig bleiben. Alle zuvor berechneten Hash-Werte werden dadurch ungültig.
+    """
+    rng = random.Random(value)
+    BLACK_KEYS[:] = [rng.getrandbits(64) for _ in range(225)]
+    WHITE_KEYS[:] = [rng.getrandbits(64) for _ in range(225)]
+    SIDE_KEY[:] = [rng.getrandbits(64)]
+    MOVE_KEYS[Piece.BLACK.value][:] = [key ^ SIDE_KEY[0] for key in BLACK_KEYS]
+    MOVE_KEYS[Piece.WHITE.value][:] = [key ^ SIDE_KEY[0] for key in WHITE_KEYS]
+    for player, keys in MOVE_KEYS.items():
+        SYMMETRIC_MOVE_KEYS[player][:] = [tuple(keys[mapping[idx]] for mapping in SYMMETRIES) for idx in range(225)]
+
+
+def canonical_key(hashes: tuple) -> tuple[int, int]:
+    """
+    Gibt den kanonischen Hash und die Symmetrie zurück, die die Stellung in die kanonische Orientierung überführt.
+    """
+    key = min(hashes)
+    return key, hashes.index(key)
+
+
+seed()
+
 
 class Zobrist:
     """
     Diese Klasse ist zur Berechnung der Hash-Werte von Gomoku Stellungen zuständig.
-    Die Klasse muss ausimplementiert werden, wie auf dem Projektblatt beschrieben.
     """
 
-    def __init__(self) -> None:
-        self.white = np.random.randint(2**15 - 1, 2**31 - 1, size=(15, 15))
-        self.black = np.random.randint(2**15 - 1, 2**31 - 1, size=(15, 15))
-
     def update_hash(self, old_hash: int, row: int, col: int, player: int) -> int:
         """
-        Die Methode bekommt den bisherigen Hash-Wert einer Stellung und den 
+        Die Methode bekommt den bisherigen Hash-Wert einer Stellung und den
         gemachten Zug übergeben. Daraus berechnet die Methode den neuen Hashwert der Stellung
-        und gibt diesen zurück.
+        und gibt diesen zurück. Der Spieler am Zug wechselt dabei.
+        """
+        return old_hash ^ MOVE_KEYS[player][row * 15 + col]
+
+    def hash_board(self, board: list[list[int]], player: int) -> int:
+        """
+        Berechnet den Hash-Wert einer Stellung, in der player am Zug ist.
+        """
+        zobrist_hash = SIDE_KEY[0] if player == Piece.WHITE.value else 0
+        for row in range(15):
+            for col in range(15):
+                if board[row][col] == Piece.BLACK.value:
+                    zobrist_hash ^= BLACK_KEYS[row * 15 + col]
+                elif board[row][col] == Piece.WHITE.value:
+                    zobrist_hash ^= WHITE_KEYS[row * 15 + col]
+        return zobrist_hash
+
+    def update_symmetric_hashes(self, hashes: tuple, row: int, col: int, player: int) -> tuple:
+        """
+        Wie update_hash, aber für die Hashes aller 8 symmetrischen Bilder der Stellung.
+        """
+        k = SYMMETRIC_MOVE_KEYS[player][row * 15 + col]
+        return (hashes[0] ^ k[0], hashes[1] ^ k[1], hashes[2] ^ k[2], hashes[3] ^ k[3],
+                hashes[4] ^ k[4], hashes[5] ^ k[5], hashes[6] ^ k[6], hashes[7] ^ k[7])
+
+    def hash_board_symmetric(self, board: list[list[int]], player: int) -> tuple:
+        """
+        Berechnet die Hashes der 8 symmetrischen Bilder einer Stellung, in der player am Zug ist.
+        Der Eintrag 0 ist der Hash der Stellung selbst.
         """
-        return old_hash ^ self.white[row, col] if player == Piece.WHITE.value else old_hash ^ self.black[row, col]
+        side = SIDE_KEY[0] if player == Piece.WHITE.value else 0
+        hashes = [side] * 8
+        for row in range(15):
+            for col in range(15):
+                if board[row][col] != 0:
+                    keys = BLACK_KEYS if board[row][col] == Piece.BLACK.value else WHITE_KEYS
+                    for transform, mapping in enumerate(SYMMETRIES):
+                        hashes[transform] ^= keys[mapping[row * 15 + col]]
+        return tuple(hashes)